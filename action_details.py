@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Individual votes from Legistar Action Details pages over plain HTTP.
+
+Each "Action details" link on a meeting page opens a RadWindow whose iframe
+loads HistoryDetail.aspx?ID=...&GUID=... . Instead of clicking every link and
+waiting for the popup, this module:
+- Takes every link's target from the meeting page snapshot (meeting_page.py)
+- Fetches the HistoryDetail pages concurrently over the pooled session
+- Parses the two-column vote tables (lxml if installed, else html.parser),
+  in a process pool when there are enough pages to be worth it
+
+It also reads an open popup's vote table directly from its own frame
+(read_popup_votes) for the pages that still have to be clicked, and can save
+either kind of page to the raw HTML archive (html_archive.py).
+
+Usage:
+    meeting = snapshot_meeting(page)
+    urls_by_file = action_detail_targets(meeting["actions"])
+    item_votes = fetch_action_detail_votes(urls_by_file)
+"""
+
+import os
+import re
+import atexit
+import multiprocessing
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from legistar_api import MAX_WORKERS, fetch_text
+
+WEBSITE_BASE = "https://phoenix.legistar.com"
+
+HISTORY_DETAIL_PATTERN = re.compile(r"HistoryDetail\.aspx\?[^'\"\s]+")
+FILE_NUMBER_PATTERN = re.compile(r"(\d{2}-\d+)")
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+# Two-cell rows and the file numbers shown in an Action Details popup frame
+POPUP_VOTES_JS = """
+() => {
+    const rows = [];
+    for (const tr of document.querySelectorAll('tr')) {
+        const cells = Array.from(tr.children).filter(cell => cell.tagName === 'TD');
+        if (cells.length === 2) {
+            rows.push([cells[0].textContent || '', cells[1].textContent || '']);
+        }
+    }
+    const files = (document.body?.textContent || '').match(/\\d{2}-\\d+/g) || [];
+    return {rows: rows, files: Array.from(new Set(files))};
+}
+"""
+
+# Pages below this count are parsed in-process (pool startup would dominate)
+PARSE_POOL_MIN = 8
+
+_parse_pool = None
+
+
+def action_detail_url(link):
+    """HistoryDetail URL of one snapshot "actions" entry, or None."""
+    url_match = HISTORY_DETAIL_PATTERN.search(link.get("target") or "")
+    return f"{WEBSITE_BASE}/{url_match.group(0)}" if url_match else None
+
+
+def action_detail_targets(links):
+    """
+    Turn snapshot "actions" ({row, target} per link) into {file_number: HistoryDetail URL}.
+
+    Links whose row has no file number or whose target is not a
+    HistoryDetail page are left out (callers fall back to clicking them).
+    """
+    urls_by_file = {}
+    for link in links:
+        file_match = FILE_NUMBER_PATTERN.search(link.get("row") or "")
+        url = action_detail_url(link)
+        if not file_match or not url:
+            continue
+        urls_by_file.setdefault(file_match.group(1), url)
+    return urls_by_file
+
+
+class _VoteTableParser(HTMLParser):
+    """Collects the text of every table row that has exactly two cells."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._stack = []  # open rows: lists of cell texts (innermost last)
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._stack.append([])
+        elif tag == "td" and self._stack:
+            self._stack[-1].append("")
+            self._cell = len(self._stack)
+
+    def handle_endtag(self, tag):
+        if tag == "tr" and self._stack:
+            cells = self._stack.pop()
+            if len(cells) == 2:
+                self.rows.append((cells[0].strip(), cells[1].strip()))
+            self._cell = None
+        elif tag == "td":
+            self._cell = None
+
+    def handle_data(self, data):
+        if self._cell is not None and self._cell == len(self._stack) and self._stack[-1]:
+            self._stack[-1][-1] += data
+
+
+def _two_cell_rows(html):
+    """Return (first, second) cell text for every two-cell table row."""
+    try:
+        import lxml.html
+    except ImportError:
+        parser = _VoteTableParser()
+        parser.feed(html)
+        parser.close()
+        return parser.rows
+    doc = lxml.html.fromstring(html)
+    rows = []
+    for tr in doc.iter("tr"):
+        cells = tr.findall("td")
+        if len(cells) == 2:
+            rows.append((cells[0].text_content().strip(), cells[1].text_content().strip()))
+    return rows
+
+
+def votes_from_rows(rows):
+    """Build {member: vote} from (name, vote) cell pairs, skipping the header row."""
+    votes = {}
+    for name, vote in rows:
+        name = " ".join(name.split())
+        vote = " ".join(vote.split())
+        if name and vote and name != "Person Name":
+            votes[name] = vote
+    return votes
+
+
+def parse_history_detail(html):
+    """Extract {member: vote} from a HistoryDetail page (same rules as the popup reader)."""
+    if not html:
+        return {}
+    return votes_from_rows(_two_cell_rows(html))
+
+
+def parse_history_detail_for(html, file_number):
+    """
+    Votes from a HistoryDetail page fetched for file_number, or None if the
+    page cannot be trusted: it shows other file numbers (like a mismatched
+    popup), or it has no votes and never mentions file_number (an error,
+    login or session-expired page). Callers fall back to the popup for None.
+    """
+    if not html:
+        return None
+    files = set(FILE_NUMBER_PATTERN.findall(TAG_PATTERN.sub(" ", html)))
+    if files and file_number not in files:
+        return None
+    votes = parse_history_detail(html)
+    if not votes and file_number not in files:
+        return None
+    return votes
+
+
+def find_popup_frame(page):
+    """The most recently attached HistoryDetail frame on the page, or None."""
+    for frame in reversed(page.frames):
+        if HISTORY_DETAIL_PATTERN.search(frame.url):
+            return frame
+    return None
+
+
+def _popup_votes(result, file_number):
+    """Votes from a POPUP_VOTES_JS result, or None if it belongs to another item."""
+    files = result["files"]
+    if files and not file_number.startswith("item_") and file_number not in files:
+        print(f"    Popup did not match {file_number}; votes ignored")
+        return None
+    return votes_from_rows(result["rows"])
+
+
+def read_popup_votes(page, file_number, frame=None):
+    """
+    Read {member: vote} from the open Action Details popup in one evaluate.
+
+    Only the popup's own frame is read (frame, as returned by
+    page_waits.open_popup, else the newest HistoryDetail frame), so the cost
+    does not grow with the size of the meeting grid. Returns {} if there is
+    no popup frame or it shows file numbers that do not include file_number.
+    """
+    frame = frame or find_popup_frame(page)
+    if frame is None:
+        return {}
+    try:
+        return _popup_votes(frame.evaluate(POPUP_VOTES_JS), file_number) or {}
+    except Exception:
+        return {}
+
+
+async def read_popup_votes_async(page, file_number, frame=None):
+    """Async read_popup_votes()."""
+    frame = frame or find_popup_frame(page)
+    if frame is None:
+        return {}
+    try:
+        return _popup_votes(await frame.evaluate(POPUP_VOTES_JS), file_number) or {}
+    except Exception:
+        return {}
+
+
+def archive_popup(archive, page, link, file_number, frame=None):
+    """
+    Save the open popup's HTML to an html_archive.HtmlArchive, whatever it
+    shows, under the link's HistoryDetail URL (the key rebuild_meeting_data
+    looks up and checks the page against), else the frame's own URL.
+    """
+    frame = frame or find_popup_frame(page)
+    if frame is None:
+        return
+    try:
+        archive.put(action_detail_url(link) or frame.url, frame.content(), "action",
+                    {"file_number": file_number, "meeting_url": page.url, "frame_url": frame.url})
+    except Exception as e:
+        print(f"    Could not archive popup for {file_number}: {e}")
+
+
+async def archive_popup_async(archive, page, link, file_number, frame=None):
+    """Async archive_popup()."""
+    frame = frame or find_popup_frame(page)
+    if frame is None:
+        return
+    try:
+        archive.put(action_detail_url(link) or frame.url, await frame.content(), "action",
+                    {"file_number": file_number, "meeting_url": page.url, "frame_url": frame.url})
+    except Exception as e:
+        print(f"    Could not archive popup for {file_number}: {e}")
+
+
+def _get_parse_pool():
+    """Process pool for parsing, or None where one cannot be used."""
+    global _parse_pool
+    # Pool workers are daemonic and may not start children of their own
+    if multiprocessing.current_process().daemon:
+        return None
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor()
+        atexit.register(_parse_pool.shutdown)
+    return _parse_pool
+
+
+def parse_many(pages, file_numbers):
+    """
+    Parse HistoryDetail pages fetched for file_numbers; returns a list of
+    vote dicts (None for untrusted pages, see parse_history_detail_for) in
+    input order.
+    """
+    pool = _get_parse_pool() if len(pages) >= PARSE_POOL_MIN else None
+    if pool is None:
+        return [parse_history_detail_for(html, f) for html, f in zip(pages, file_numbers)]
+    chunksize = max(1, len(pages) // ((os.cpu_count() or 1) * 4))
+    return list(pool.map(parse_history_detail_for, pages, file_numbers, chunksize=chunksize))
+
+
+def fetch_action_detail_votes(urls_by_file, max_workers=MAX_WORKERS, archive=None):
+    """
+    Fetch and parse HistoryDetail pages concurrently.
+
+    Returns {file_number: {member: vote}} for every page downloaded ({} for
+    actions without a roll call). Pages that failed to download, or that
+    do not belong to their item (error or login pages, another item's page),
+    are left out, so callers can fall back to the popup for them. Every page
+    downloaded is saved to archive (an html_archive.HtmlArchive) if one is
+    given, before parsing, so rejected pages can be replayed too.
+    """
+    file_numbers = list(urls_by_file)
+    if not file_numbers:
+        return {}
+    workers = max(1, min(max_workers, len(file_numbers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = list(executor.map(
+            lambda file_number: fetch_text(urls_by_file[file_number], verbose=False),
+            file_numbers
+        ))
+
+    fetched = [(file_number, html) for file_number, html in zip(file_numbers, pages) if html]
+    if archive:
+        for file_number, html in fetched:
+            archive.put(urls_by_file[file_number], html, "action", {"file_number": file_number})
+    parsed = parse_many([html for _, html in fetched], [file_number for file_number, _ in fetched])
+    item_votes = {}
+    for (file_number, _), votes in zip(fetched, parsed):
+        if votes is not None:
+            item_votes[file_number] = votes
+    rejected = len(fetched) - len(item_votes)
+    if rejected:
+        print(f"    {rejected} Action Details pages did not match their item; clicking their popups instead")
+    return item_votes
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Async Playwright engine for scraping many meeting pages at once.
+
+Runs one Chromium with N concurrent browser contexts (one per meeting),
+bounded by an asyncio semaphore. Which popups to click and how votes are
+collected is shared with the process engine (meeting_scrape.MeetingVotes).
+A meeting whose context or page fails to open is reported as None; the
+other meetings carry on.
+
+Usage (from fetch_data_parallel.py --engine async):
+    results = run_scrape_meetings(
+        [(event_id, meeting_url, skip_file_numbers), ...],
+        concurrency=8, headless=True
+    )
+"""
+
+import asyncio
+
+import page_waits
+import run_metrics
+from action_details import fetch_action_detail_votes, read_popup_votes_async, archive_popup_async
+from meeting_page import ACTION_DETAILS_SELECTOR, snapshot_meeting_async
+from meeting_scrape import MeetingVotes
+from resource_filter import ResourceFilter
+from html_archive import get_archive
+
+DEFAULT_CONCURRENCY = 8
+
+
+async def scrape_meeting(page, meeting_url, skip_file_numbers=None, http_votes=False, archive=None):
+    """
+    Scrape a meeting page to get:
+    - Document URLs (Agenda, Minutes, Results)
+    - Individual votes for each agenda item
+    - Absent members
+
+    Action Details popups are not opened for file numbers in skip_file_numbers.
+    With http_votes, HistoryDetail pages are fetched directly (in a thread, so
+    other pages keep going) and popups are only clicked for failed downloads.
+    With an archive, the meeting page and Action Details pages are saved to it.
+    """
+    try:
+        with run_metrics.span("page_goto", url=meeting_url):
+            await page_waits.goto_async(page, meeting_url, ready_selector=page_waits.MEETING_READY_SELECTOR)
+
+        # Links, grid rows and Action details targets in one round trip
+        meeting = await snapshot_meeting_async(page)
+        if archive:
+            archive.put(meeting_url, await page.content(), "meeting")
+        votes = MeetingVotes(meeting, skip_file_numbers)
+
+        # Votes straight from the HistoryDetail pages, no clicking
+        if http_votes:
+            urls_by_file = votes.http_targets()
+            with run_metrics.span("action_details_http", pages=len(urls_by_file)):
+                votes.add_http_votes(
+                    await asyncio.to_thread(fetch_action_detail_votes, urls_by_file, archive=archive)
+                )
+
+        # Click each remaining Action details link and extract votes
+        action_detail_links = page.locator(ACTION_DETAILS_SELECTOR)
+        for i, file_number in votes.popup_targets():
+            try:
+                with run_metrics.span("action_popup", file_number=file_number):
+                    frame = await page_waits.open_popup_async(page, action_detail_links.nth(i))
+
+                    # Raw popup first, so pages the parser gets nothing from can be replayed
+                    if archive:
+                        await archive_popup_async(archive, page, meeting["actions"][i], file_number, frame)
+                    votes.add(file_number, await read_popup_votes_async(page, file_number, frame))
+
+                    # Close popup
+                    await page_waits.close_popup_async(page)
+
+            except Exception:
+                try:
+                    await page.keyboard.press("Escape")
+                except Exception:
+                    pass
+
+        return votes.meeting_data()
+
+    except Exception as e:
+        print(f"    Error scraping meeting: {e}")
+        return None
+
+
+async def scrape_meetings(jobs, concurrency=DEFAULT_CONCURRENCY, headless=True, http_votes=False,
+                          allow_resources=None, archive=False, on_result=None):
+    """
+    Scrape many meetings concurrently in a single browser.
+
+    jobs: list of (key, meeting_url, skip_file_numbers).
+    allow_resources: allowlist for the per-context ResourceFilter.
+    archive: save raw pages to the HTML archive (html_archive.py).
+    on_result: if given, called as on_result(key, meeting_data) as each
+    meeting finishes, and results are not collected.
+    Returns {key: meeting_data or None} ({} with on_result).
+    """
+    from playwright.async_api import async_playwright
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+    html_archive = get_archive() if archive else None
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless)
+
+        async def run_job(key, meeting_url, skip_file_numbers):
+            async with semaphore:
+                print(f"  [Page] Processing: {meeting_url}")
+                meeting_data = None
+                context = None
+                resource_filter = ResourceFilter(allow_resources)
+                try:
+                    # A failure here only loses this meeting, not the whole run
+                    context = await browser.new_context()
+                    await resource_filter.install_async(context)
+                    page = await context.new_page()
+                    with run_metrics.span("meeting", event_id=key):
+                        meeting_data = await scrape_meeting(page, meeting_url, skip_file_numbers, http_votes,
+                                                            html_archive)
+                    stats = resource_filter.take_stats()
+                    run_metrics.count("browser_bytes", stats.loaded_bytes)
+                    print(f"  [Page] Completed: {meeting_url} ({stats.summary()})")
+                except Exception as e:
+                    print(f"    Error scraping meeting {meeting_url}: {e}")
+                finally:
+                    if context is not None:
+                        try:
+                            await context.close()
+                        except Exception:
+                            pass
+                if on_result:
+                    on_result(key, meeting_data)
+                else:
+                    results[key] = meeting_data
+
+        try:
+            await asyncio.gather(*[run_job(*job) for job in jobs])
+        finally:
+            await browser.close()
+
+    return results
+
+
+def run_scrape_meetings(jobs, concurrency=DEFAULT_CONCURRENCY, headless=True, http_votes=False,
+                        allow_resources=None, archive=False, on_result=None):
+    """Synchronous entry point for scrape_meetings()."""
+    return asyncio.run(scrape_meetings(jobs, concurrency=concurrency, headless=headless,
+                                       http_votes=http_votes, allow_resources=allow_resources,
+                                       archive=archive, on_result=on_result))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Worker pool sizing for --workers auto.
+
+auto_worker_count() sizes the browser pool from the host: one worker per
+spare CPU core, capped by how many Chromium instances fit in the memory
+currently available (BROWSER_MEMORY_MB each, keeping MEMORY_HEADROOM free).
+
+ConcurrencyController then adjusts how many meetings are in flight during
+the run (additive increase, multiplicative decrease), starting at half the
+pool:
+- after each window of finished meetings, if the failure rate (scrape
+  errors and timeouts against Legistar) is above MAX_FAILURE_RATE the
+  limit is halved
+- otherwise the limit grows by one while throughput keeps improving, and
+  steps back by one if the last increase made it worse
+
+Usage:
+    workers = auto_worker_count()
+    controller = ConcurrencyController(workers)
+    ... keep controller.limit meetings in flight ...
+    controller.record(ok)
+"""
+
+import os
+import time
+
+# Resident memory of one worker Chromium with a meeting page open
+BROWSER_MEMORY_MB = 450
+
+# Fraction of available memory left for everything else
+MEMORY_HEADROOM = 0.25
+
+MAX_AUTO_WORKERS = 16
+
+# Failure rate in a window above which concurrency is halved
+MAX_FAILURE_RATE = 0.2
+
+# Throughput must drop by more than this after an increase to undo it
+THROUGHPUT_TOLERANCE = 0.1
+
+
+def available_memory_mb():
+    """Memory available to new processes in MB, or None if unknown."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def auto_worker_count(verbose=True):
+    """Number of browser workers this host can run (at least 1)."""
+    cpus = os.cpu_count() or 1
+    by_cpu = max(1, cpus - 1)  # leave a core for the parent process
+    memory_mb = available_memory_mb()
+    by_memory = by_cpu if memory_mb is None else int(memory_mb * (1 - MEMORY_HEADROOM) // BROWSER_MEMORY_MB)
+    workers = max(1, min(by_cpu, by_memory, MAX_AUTO_WORKERS))
+    if verbose:
+        memory = "unknown" if memory_mb is None else f"{memory_mb / 1024:.1f} GB"
+        print(f"  Auto workers: {workers} ({cpus} cores, {memory} available, "
+              f"~{BROWSER_MEMORY_MB} MB per browser)")
+    return workers
+
+
+class ConcurrencyController:
+    """AIMD limit on meetings in flight, between 1 and max_limit."""
+
+    def __init__(self, max_limit, start=None, window=None):
+        self.max_limit = max(1, max_limit)
+        # Start at half the pool and probe upwards
+        self.limit = min(self.max_limit, start or max(1, (self.max_limit + 1) // 2))
+        self.window = window
+        self._results = []
+        self._window_started = time.monotonic()
+        self._last_throughput = None
+        self._last_change = 0
+
+    def record(self, ok):
+        """Record one finished meeting; re-evaluates the limit after each window."""
+        self._results.append(ok)
+        if len(self._results) >= (self.window or max(2, self.limit)):
+            self._evaluate()
+
+    def _evaluate(self):
+        now = time.monotonic()
+        failures = self._results.count(False)
+        failure_rate = failures / len(self._results)
+        throughput = len(self._results) / max(now - self._window_started, 1e-6)
+        self._results = []
+        self._window_started = now
+
+        old = self.limit
+        if failure_rate > MAX_FAILURE_RATE:
+            self.limit = max(1, self.limit // 2)
+            reason = f"{failure_rate:.0%} of meetings failed"
+        elif (self._last_change > 0 and self._last_throughput
+              and throughput < self._last_throughput * (1 - THROUGHPUT_TOLERANCE)):
+            self.limit = max(1, self.limit - 1)
+            reason = "throughput dropped after the last increase"
+        elif self._last_change < 0:
+            reason = "holding after a step back"
+        else:
+            self.limit = min(self.max_limit, self.limit + 1)
+            reason = "throughput holding"
+        self._last_change = self.limit - old
+        self._last_throughput = throughput
+        if self.limit != old:
+            print(f"  [Autoscale] {old} -> {self.limit} meetings in flight ({reason}; "
+                  f"{throughput * 60:.1f} meetings/min)")
@@ -15,7 +15,6 @@ Council Members for 2020:
 - Carlos Garcia (D8)
 """
 
-import requests
 import csv
 import time
 import re
@@ -23,9 +22,24 @@ import argparse
 from datetime import datetime
 from playwright.sync_api import sync_playwright
 
+from legistar_api import (
+    fetch_json, get_event_items_many, set_cache_enabled,
+    get_votes_many, get_api_item_votes, get_matter_index_names
+)
+from action_details import fetch_action_detail_votes, read_popup_votes, archive_popup
+from meeting_page import ACTION_DETAILS_SELECTOR, snapshot_meeting
+from meeting_scrape import MeetingVotes
+import page_waits
+from resource_filter import ResourceFilter, parse_allowlist, DEFAULT_ALLOW
+from html_archive import get_archive
+from sync_state import get_checkpoint_store
+
 BASE_URL = "https://webapi.legistar.com/v1/phoenix"
 WEBSITE_BASE = "https://phoenix.legistar.com"
 
+# Namespace of this fetcher's checkpoints (sync_state.get_checkpoint_store)
+CHECKPOINT_NAME = "fetch_2020_data_enhanced"
+
 # Council members for 2020
 COUNCIL_MEMBERS_2020 = [
     "Kate Gallego (Mayor)",
@@ -53,19 +67,6 @@ NAME_MAPPING_2020 = {
 }
 
 
-def fetch_json(url):
-    """Fetch JSON from URL with retry logic."""
-    for attempt in range(3):
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"  Attempt {attempt + 1} failed: {e}")
-            time.sleep(2)
-    return None
-
-
 def get_2020_events(start_month=1, end_month=4):
     """Get City Council Formal Meeting events for specified period in 2020."""
     start_date = f"2020-{start_month:02d}-01"
@@ -114,13 +115,21 @@ class WebScraper:
         self.playwright = None
         self.browser = None
         self.page = None
+        self.resource_filter = None
+        self.archive = None
         self.current_meeting_data = {}
 
-    def start(self, headless=True):
-        """Start the browser."""
+    def start(self, headless=True, allow_resources=None, archive=False):
+        """
+        Start the browser (unneeded resources blocked, see resource_filter.py).
+        With archive, raw pages are saved to the HTML archive (html_archive.py).
+        """
+        self.archive = get_archive() if archive else None
         self.playwright = sync_playwright().start()
         self.browser = self.playwright.chromium.launch(headless=headless)
         self.page = self.browser.new_page()
+        self.resource_filter = ResourceFilter(allow_resources)
+        self.resource_filter.install(self.page)
         print(f"Browser started (headless={headless})")
 
     def stop(self):
@@ -131,17 +140,22 @@ class WebScraper:
             self.playwright.stop()
         print("Browser stopped")
 
-    def scrape_meeting(self, meeting_url):
+    def scrape_meeting(self, meeting_url, skip_file_numbers=None, http_votes=False):
         """
         Scrape a meeting page to get:
         - Document URLs (Agenda, Minutes, Results)
         - Individual votes for each agenda item
         - Absent members
+
+        Action Details popups are not opened for file numbers in
+        skip_file_numbers (items whose votes already came from the API).
+        With http_votes, the HistoryDetail pages behind the popups are
+        fetched directly; popups are only clicked for failed downloads.
         """
         print(f"  Scraping meeting page...")
+        self.resource_filter.take_stats()
         try:
-            self.page.goto(meeting_url, wait_until="networkidle", timeout=60000)
-            time.sleep(2)
+            page_waits.goto(self.page, meeting_url, ready_selector=page_waits.MEETING_READY_SELECTOR)
 
             meeting_data = {
                 "agenda_url": "",
@@ -152,14 +166,18 @@ class WebScraper:
                 "absent_members": set()
             }
 
-            # Extract document URLs
-            meeting_data["agenda_url"] = self._extract_link_href("Agenda")
-            meeting_data["minutes_url"] = self._extract_link_href("Minutes")
-            meeting_data["results_url"] = self._extract_link_href("Results")
+            # Links, grid rows and Action details targets in one round trip
+            meeting = snapshot_meeting(self.page)
+            if self.archive:
+                self.archive.put(meeting_url, self.page.content(), "meeting")
+            meeting_data["agenda_url"] = meeting["agenda_url"]
+            meeting_data["minutes_url"] = meeting["minutes_url"]
+            meeting_data["results_url"] = meeting["results_url"]
 
             # Get all agenda items and their action details
-            meeting_data["item_votes"], meeting_data["absent_members"] = self._scrape_all_action_details()
-            meeting_data["item_detail_urls"] = getattr(self, 'item_detail_urls', {})
+            meeting_data["item_votes"], meeting_data["absent_members"] = self._scrape_all_action_details(meeting, skip_file_numbers, http_votes)
+            meeting_data["item_detail_urls"] = meeting["item_detail_urls"]
+            print(f"    Resources: {self.resource_filter.take_stats().summary()}")
 
             self.current_meeting_data = meeting_data
             return meeting_data
@@ -168,119 +186,53 @@ class WebScraper:
             print(f"    Error scraping meeting: {e}")
             return None
 
-    def _extract_link_href(self, text_pattern):
-        """Extract href from a link containing the text pattern."""
-        try:
-            links = self.page.query_selector_all("a")
-            for link in links:
-                text = link.text_content() or ""
-                if text_pattern.lower() in text.lower():
-                    href = link.get_attribute("href")
-                    if href and "View.ashx" in href:
-                        if href.startswith("/"):
-                            return WEBSITE_BASE + href
-                        return href
-        except:
-            pass
-        return ""
-
-    def _scrape_all_action_details(self):
+    def _scrape_all_action_details(self, meeting, skip_file_numbers=None, http_votes=False):
         """Scrape Action Details for all agenda items to get individual votes."""
-        item_votes = {}
-        item_detail_urls = {}
-        absent_members = set()
+        votes = MeetingVotes(meeting, skip_file_numbers)
 
         try:
-            # Collect file numbers and detail URLs
-            rows = self.page.query_selector_all("table tr")
-            for row in rows:
-                cells = row.query_selector_all("td")
-                if len(cells) >= 7:
-                    file_link = cells[0].query_selector("a")
-                    if file_link:
-                        file_text = (file_link.text_content() or "").strip()
-                        if re.match(r'^\d{2}-\d+$', file_text):
-                            href = file_link.get_attribute("href")
-                            if href:
-                                if not href.startswith("http"):
-                                    if href.startswith("/"):
-                                        href = WEBSITE_BASE + href
-                                    else:
-                                        href = WEBSITE_BASE + "/" + href
-                                item_detail_urls[file_text] = href
-
-            # Find all Action details links
-            self.page.wait_for_selector("table tr", timeout=10000)
-            time.sleep(3)
-
-            action_detail_links = self.page.locator("a:has-text('Action details')").all()
-            print(f"    Found {len(action_detail_links)} Action details links, {len(item_detail_urls)} item detail URLs")
-
-            for i, link in enumerate(action_detail_links[:100]):
+            # Votes straight from the HistoryDetail pages, no clicking
+            if http_votes:
+                urls_by_file = votes.http_targets()
+                fetched = fetch_action_detail_votes(urls_by_file, archive=self.archive)
+                print(f"    Fetched {len(fetched)} of {len(urls_by_file)} Action Details pages over HTTP")
+                votes.add_http_votes(fetched)
+
+            # Click each remaining Action details link and extract vote data
+            action_detail_links = self.page.locator(ACTION_DETAILS_SELECTOR)
+            print(f"    Found {len(meeting['action_files'])} Action details links, {len(meeting['item_detail_urls'])} item detail URLs")
+
+            for i, file_number in votes.popup_targets():
                 try:
-                    row_text = link.evaluate("el => el.closest('tr')?.textContent || ''")
-                    agenda_match = re.search(r'(\d{2}-\d+)', row_text)
-                    file_number = agenda_match.group(1) if agenda_match else f"item_{i}"
+                    # Click to open popup and wait for its iframe to load
+                    frame = page_waits.open_popup(self.page, action_detail_links.nth(i))
 
-                    link.click()
-                    time.sleep(0.8)
-
-                    try:
-                        self.page.wait_for_selector("dialog, [role='dialog'], .RadWindow", timeout=5000)
-                    except:
-                        pass
+                    # Archive the raw popup, then extract its votes
+                    if self.archive:
+                        archive_popup(self.archive, self.page, meeting["actions"][i], file_number, frame)
+                    votes.add(file_number, read_popup_votes(self.page, file_number, frame))
 
-                    votes = self._extract_votes_from_popup()
-                    if votes:
-                        item_votes[file_number] = votes
-                        for member, vote in votes.items():
-                            if vote.lower() == "absent":
-                                absent_members.add(member)
-
-                    close_btn = self.page.locator("button:has-text('Close'), .rwCloseButton, [title='Close']").first
-                    try:
-                        close_btn.click(timeout=2000)
-                        time.sleep(0.3)
-                    except:
-                        self.page.keyboard.press("Escape")
-                        time.sleep(0.3)
+                    # Close the popup (Close button, else Escape)
+                    page_waits.close_popup(self.page)
 
                 except Exception as e:
+                    # Try to close any open popup
                     try:
                         self.page.keyboard.press("Escape")
                     except:
                         pass
 
-            self.item_detail_urls = item_detail_urls
-            return item_votes, absent_members
+            # Store the detail URLs for later summary scraping
+            self.item_detail_urls = meeting["item_detail_urls"]
+
+            return votes.item_votes, votes.absent_members
 
         except Exception as e:
             print(f"    Error scraping action details: {e}")
             return {}, set()
 
-    def _extract_votes_from_popup(self):
-        """Extract individual votes from the action details popup."""
-        votes = {}
-        try:
-            frames = self.page.frames
-            for frame in frames:
-                try:
-                    rows = frame.query_selector_all("table tr")
-                    for row in rows:
-                        cells = row.query_selector_all("td")
-                        if len(cells) == 2:
-                            name = (cells[0].text_content() or "").strip()
-                            vote = (cells[1].text_content() or "").strip()
-                            if name and vote and name != "Person Name":
-                                votes[name] = vote
-                except:
-                    continue
-        except:
-            pass
-        return votes
-
-
-def build_row(event, item, council_members, name_mapping, absent_members=None, item_votes=None, meeting_data=None):
+
+def build_row(event, item, council_members, name_mapping, absent_members=None, item_votes=None, meeting_data=None, matter_indexes=None):
     """Build a CSV row from event, item, and scraped data."""
     absent_members = absent_members or set()
     item_votes = item_votes or {}
@@ -322,8 +274,9 @@ def build_row(event, item, council_members, name_mapping, absent_members=None, i
 
         council_votes.append(vote)
 
-    # Extract index/district
-    index_name = extract_index_from_title(item.get("EventItemTitle", ""))
+    # Index/district from the matter record; fall back to guessing from the title
+    index_name = (matter_indexes or {}).get(item.get("EventItemMatterId")) or \
+        extract_index_from_title(item.get("EventItemTitle", ""))
 
     # Document URLs
     agenda_url = meeting_data.get("agenda_url", "") or event.get("EventAgendaFile", "") or ""
@@ -385,8 +338,21 @@ def main():
                         default="/Users/michaelingram/Documents/GitHub/PhoenixCityCouncil/phoenix_council_2020_Q1_enhanced.csv",
                         help='Output CSV file path')
     parser.add_argument('--headed', action='store_true', help='Run browser in headed mode')
+    parser.add_argument('--http-votes', action='store_true',
+                        help='Fetch Action Details (HistoryDetail) pages over HTTP instead of clicking popups')
+    parser.add_argument('--allow-resources', type=str, default=DEFAULT_ALLOW,
+                        help='Comma separated resource types / URL substrings not to block ("all" disables blocking)')
+    parser.add_argument('--archive-html', action='store_true',
+                        help='Save raw meeting and Action Details pages to the compressed HTML archive')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip meetings finished by an earlier (interrupted) run and unchanged since')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Bypass the on-disk API response cache')
     args = parser.parse_args()
 
+    if args.no_cache:
+        set_cache_enabled(False)
+
     council_members = COUNCIL_MEMBERS_2020
     name_mapping = NAME_MAPPING_2020
 
@@ -408,8 +374,27 @@ def main():
         print("No events found!")
         return
 
+    # Meetings checkpointed by an earlier run (and unchanged since) are not redone
+    checkpoints = get_checkpoint_store()
+    resumed = checkpoints.get_many(CHECKPOINT_NAME, events) if args.resume else {}
+    pending = [event for event in events if event.get("EventId") not in resumed]
+    if args.resume:
+        print(f"  Resuming: {len(resumed)} meetings already done, {len(pending)} to process")
+
+    items_by_event = get_event_items_many(pending) if pending else {}
+    pending_items = [item for items in items_by_event.values() for item in items or []]
+    for event_id, checkpoint in resumed.items():
+        items_by_event[event_id] = checkpoint["items"]
+
+    all_items = [item for items in items_by_event.values() for item in items or []]
+    votes_by_item = get_votes_many(pending_items)
+    print(f"  API votes found for {len(votes_by_item)} of {len(pending_items)} agenda items")
+    matter_indexes = get_matter_index_names(item.get("EventItemMatterId") for item in all_items)
+
     scraper = WebScraper()
-    scraper.start(headless=not args.headed)
+    if pending:
+        scraper.start(headless=not args.headed, allow_resources=parse_allowlist(args.allow_resources),
+                      archive=args.archive_html)
 
     all_rows = []
 
@@ -421,32 +406,59 @@ def main():
 
             print(f"\nProcessing event {i+1}/{len(events)}: {event_date} (ID: {event_id})")
 
-            meeting_data = None
-            if meeting_url:
-                meeting_data = scraper.scrape_meeting(meeting_url)
-
-            absent_members = set()
-            item_votes = {}
-            if meeting_data:
-                absent_members = meeting_data.get("absent_members", set())
-                item_votes = meeting_data.get("item_votes", {})
+            # None if the items could not be fetched
+            items = items_by_event.get(event_id)
+            items_failed = items is None
+            items = items or []
+
+            if event_id in resumed:
+                # Finished by an earlier run
+                checkpoint = resumed[event_id]
+                meeting_data = checkpoint["meeting_data"]
+                absent_members = set(checkpoint["absent_members"])
+                item_votes = checkpoint["item_votes"]
+                print(f"    Resumed from checkpoint ({len(items)} agenda items)")
+            else:
+                api_item_votes, api_absent = get_api_item_votes(items, list(name_mapping), votes_by_item)
+
+                meeting_data = None
+                if meeting_url:
+                    meeting_data = scraper.scrape_meeting(meeting_url, skip_file_numbers=set(api_item_votes),
+                                                          http_votes=args.http_votes)
+
+                absent_members = set(api_absent)
+                item_votes = {}
+                if meeting_data:
+                    absent_members |= meeting_data.get("absent_members", set())
+                    item_votes = meeting_data.get("item_votes", {})
+                item_votes.update(api_item_votes)
                 if absent_members:
                     print(f"    Absent members: {', '.join(absent_members)}")
 
-            items = get_event_items(event_id)
-            print(f"    Found {len(items)} agenda items")
+                print(f"    Found {len(items)} agenda items")
+
+                # Checkpoint unless the items or the meeting page failed (--resume retries it)
+                if not items_failed and (meeting_data is not None or not meeting_url):
+                    checkpoints.put(CHECKPOINT_NAME, event, {
+                        "items": items,
+                        "meeting_data": meeting_data and dict(
+                            meeting_data, absent_members=sorted(meeting_data["absent_members"])
+                        ),
+                        "absent_members": sorted(absent_members),
+                        "item_votes": item_votes
+                    })
+                time.sleep(1)
 
             for item in items:
                 row = build_row(
                     event, item, council_members, name_mapping,
                     absent_members=absent_members,
                     item_votes=item_votes,
-                    meeting_data=meeting_data
+                    meeting_data=meeting_data,
+                    matter_indexes=matter_indexes
                 )
                 all_rows.append(row)
 
-            time.sleep(1)
-
     finally:
         scraper.stop()
 
@@ -4,11 +4,11 @@ Fetch Phoenix City Council meeting data for 2024 from Legistar API
 and generate a CSV file.
 """
 
-import requests
 import csv
-import time
 from datetime import datetime
 
+from legistar_api import fetch_json, fetch_many, get_event_items_many, get_matter_index_names
+
 BASE_URL = "https://webapi.legistar.com/v1/phoenix"
 
 # Current council members for 2024
@@ -24,18 +24,6 @@ COUNCIL_MEMBERS = [
     "Kesha Hodge Washington (D8)"
 ]
 
-def fetch_json(url):
-    """Fetch JSON from URL with retry logic."""
-    for attempt in range(3):
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"  Attempt {attempt + 1} failed: {e}")
-            time.sleep(2)
-    return None
-
 def get_2024_events():
     """Get City Council Formal Meeting events for Q1 2024 (Jan-Mar)."""
     url = f"{BASE_URL}/events?$filter=EventBodyId eq 138 and EventDate ge datetime'2024-01-01' and EventDate lt datetime'2024-04-01'&$orderby=EventDate asc"
@@ -55,15 +43,12 @@ def get_roll_calls(event_item_id):
     url = f"{BASE_URL}/eventitems/{event_item_id}/rollcalls"
     return fetch_json(url) or []
 
-def get_matter_indexes(matter_id):
-    """Get district/index for a matter."""
-    if not matter_id:
-        return ""
-    url = f"{BASE_URL}/matters/{matter_id}/indexes"
-    indexes = fetch_json(url)
-    if indexes and len(indexes) > 0:
-        return indexes[0].get("IndexName", "")
-    return ""
+def get_roll_calls_many(event_item_ids):
+    """Get roll call votes for several event items at once, keyed by EventItemId."""
+    event_item_ids = list(event_item_ids)
+    urls = [f"{BASE_URL}/eventitems/{item_id}/rollcalls" for item_id in event_item_ids]
+    results = fetch_many(urls)
+    return {item_id: rcs or [] for item_id, rcs in zip(event_item_ids, results)}
 
 def format_date(date_str):
     """Format ISO date to YYYY-MM-DD."""
@@ -75,7 +60,7 @@ def format_date(date_str):
     except:
         return date_str[:10] if date_str else ""
 
-def build_row(event, item, roll_calls):
+def build_row(event, item, roll_calls, matter_indexes=None):
     """Build a CSV row from event and item data."""
 
     # Build council member vote columns
@@ -116,30 +101,30 @@ def build_row(event, item, roll_calls):
 
         council_votes.append(vote)
 
-    # Get index/district (cache to avoid too many API calls)
-    index_name = ""
-    matter_id = item.get("EventItemMatterId")
+    # Get index/district from the prefetched matter indexes
+    index_name = (matter_indexes or {}).get(item.get("EventItemMatterId"), "")
 
-    # Extract district from title if present
+    # Otherwise extract district from title if present
     title = item.get("EventItemTitle", "") or ""
-    if "District 1" in title:
-        index_name = "District 1"
-    elif "District 2" in title:
-        index_name = "District 2"
-    elif "District 3" in title:
-        index_name = "District 3"
-    elif "District 4" in title:
-        index_name = "District 4"
-    elif "District 5" in title:
-        index_name = "District 5"
-    elif "District 6" in title:
-        index_name = "District 6"
-    elif "District 7" in title:
-        index_name = "District 7"
-    elif "District 8" in title:
-        index_name = "District 8"
-    elif "Citywide" in title:
-        index_name = "Citywide"
+    if not index_name:
+        if "District 1" in title:
+            index_name = "District 1"
+        elif "District 2" in title:
+            index_name = "District 2"
+        elif "District 3" in title:
+            index_name = "District 3"
+        elif "District 4" in title:
+            index_name = "District 4"
+        elif "District 5" in title:
+            index_name = "District 5"
+        elif "District 6" in title:
+            index_name = "District 6"
+        elif "District 7" in title:
+            index_name = "District 7"
+        elif "District 8" in title:
+            index_name = "District 8"
+        elif "Citywide" in title:
+            index_name = "Citywide"
 
     row = [
         format_date(event.get("EventDate")),  # MeetingDate
@@ -189,6 +174,19 @@ def main():
     # Get all 2024 events
     events = get_2024_events()
 
+    # Fetch all agenda items, then all roll calls, concurrently over pooled connections
+    items_by_event = get_event_items_many(events)
+    roll_call_item_ids = [
+        item.get("EventItemId")
+        for items in items_by_event.values()
+        for item in items or []
+        if item.get("EventItemRollCallFlag") == 1
+    ]
+    roll_calls_by_item = get_roll_calls_many(roll_call_item_ids)
+    matter_indexes = get_matter_index_names(
+        item.get("EventItemMatterId") for items in items_by_event.values() for item in items or []
+    )
+
     all_rows = []
 
     for i, event in enumerate(events):
@@ -197,24 +195,19 @@ def main():
         print(f"Processing event {i+1}/{len(events)}: {event_date} (ID: {event_id})")
 
         # Get event items
-        items = get_event_items(event_id)
+        items = items_by_event.get(event_id) or []
         print(f"  Found {len(items)} agenda items")
 
         for item in items:
             item_id = item.get("EventItemId")
 
             # Get roll calls if this is a roll call item
-            roll_calls = []
-            if item.get("EventItemRollCallFlag") == 1:
-                roll_calls = get_roll_calls(item_id)
+            roll_calls = roll_calls_by_item.get(item_id, [])
 
             # Build row
-            row = build_row(event, item, roll_calls)
+            row = build_row(event, item, roll_calls, matter_indexes)
             all_rows.append(row)
 
-        # Small delay to be nice to the API
-        time.sleep(0.5)
-
     # Write CSV
     output_file = "/Users/michaelingram/Documents/GitHub/PhoenixCityCouncil/phoenix_council_2024_Q1.csv"
     with open(output_file, "w", newline="", encoding="utf-8") as f:
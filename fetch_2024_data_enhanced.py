@@ -8,9 +8,9 @@ Features:
 - Scrapes website for individual roll call votes from Action Details popups
 - Gets document URLs (Agenda, Minutes, Results PDFs)
 - Tracks absent members correctly for all items
+- Optional item summaries (--scrape-summaries) read in a separate, cached stage
 """
 
-import requests
 import csv
 import time
 import re
@@ -18,9 +18,25 @@ import argparse
 from datetime import datetime
 from playwright.sync_api import sync_playwright
 
+from legistar_api import (
+    fetch_json, get_event_items_many, set_cache_enabled,
+    get_votes_many, get_api_item_votes, get_matter_index_names, get_file_number
+)
+from action_details import fetch_action_detail_votes, read_popup_votes, archive_popup
+from meeting_page import ACTION_DETAILS_SELECTOR, snapshot_meeting
+from meeting_scrape import MeetingVotes
+import page_waits
+from item_summaries import get_item_summaries, DEFAULT_PAGES
+from resource_filter import ResourceFilter, parse_allowlist, DEFAULT_ALLOW
+from html_archive import get_archive
+from sync_state import get_checkpoint_store
+
 BASE_URL = "https://webapi.legistar.com/v1/phoenix"
 WEBSITE_BASE = "https://phoenix.legistar.com"
 
+# Namespace of this fetcher's checkpoints (sync_state.get_checkpoint_store)
+CHECKPOINT_NAME = "fetch_2024_data_enhanced"
+
 # Council members for 2024 (correct roster)
 # Note: D7 was Yassamin Ansari in 2024, Anna Hernandez joined in 2025
 COUNCIL_MEMBERS_2024 = [
@@ -49,19 +65,6 @@ NAME_MAPPING_2024 = {
 }
 
 
-def fetch_json(url):
-    """Fetch JSON from URL with retry logic."""
-    for attempt in range(3):
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"  Attempt {attempt + 1} failed: {e}")
-            time.sleep(2)
-    return None
-
-
 def get_2024_events(start_month=1, end_month=4):
     """Get City Council Formal Meeting events for specified period in 2024."""
     start_date = f"2024-{start_month:02d}-01"
@@ -110,13 +113,21 @@ class WebScraper:
         self.playwright = None
         self.browser = None
         self.page = None
+        self.resource_filter = None
+        self.archive = None
         self.current_meeting_data = {}
 
-    def start(self, headless=True):
-        """Start the browser."""
+    def start(self, headless=True, allow_resources=None, archive=False):
+        """
+        Start the browser (unneeded resources blocked, see resource_filter.py).
+        With archive, raw pages are saved to the HTML archive (html_archive.py).
+        """
+        self.archive = get_archive() if archive else None
         self.playwright = sync_playwright().start()
         self.browser = self.playwright.chromium.launch(headless=headless)
         self.page = self.browser.new_page()
+        self.resource_filter = ResourceFilter(allow_resources)
+        self.resource_filter.install(self.page)
         print(f"Browser started (headless={headless})")
 
     def stop(self):
@@ -127,17 +138,23 @@ class WebScraper:
             self.playwright.stop()
         print("Browser stopped")
 
-    def scrape_meeting(self, meeting_url):
+    def scrape_meeting(self, meeting_url, skip_file_numbers=None, http_votes=False):
         """
         Scrape a meeting page to get:
         - Document URLs (Agenda, Minutes, Results)
         - Individual votes for each agenda item
         - Absent members
+
+        Action Details popups are not opened for file numbers in
+        skip_file_numbers (items whose votes already came from the API).
+        With http_votes, the HistoryDetail pages behind the popups are
+        fetched directly; popups are only clicked for failed downloads.
         """
         print(f"  Scraping meeting page...")
+        self.resource_filter.take_stats()
         try:
-            self.page.goto(meeting_url, wait_until="networkidle", timeout=60000)
-            time.sleep(2)  # Let page fully load
+            # Wait for the agenda grid rather than a fixed delay
+            page_waits.goto(self.page, meeting_url, ready_selector=page_waits.MEETING_READY_SELECTOR)
 
             meeting_data = {
                 "agenda_url": "",
@@ -148,14 +165,18 @@ class WebScraper:
                 "absent_members": set()
             }
 
-            # Extract document URLs
-            meeting_data["agenda_url"] = self._extract_link_href("Agenda")
-            meeting_data["minutes_url"] = self._extract_link_href("Minutes")
-            meeting_data["results_url"] = self._extract_link_href("Results")
+            # Links, grid rows and Action details targets in one round trip
+            meeting = snapshot_meeting(self.page)
+            if self.archive:
+                self.archive.put(meeting_url, self.page.content(), "meeting")
+            meeting_data["agenda_url"] = meeting["agenda_url"]
+            meeting_data["minutes_url"] = meeting["minutes_url"]
+            meeting_data["results_url"] = meeting["results_url"]
 
             # Get all agenda items and their action details
-            meeting_data["item_votes"], meeting_data["absent_members"] = self._scrape_all_action_details()
-            meeting_data["item_detail_urls"] = getattr(self, 'item_detail_urls', {})
+            meeting_data["item_votes"], meeting_data["absent_members"] = self._scrape_all_action_details(meeting, skip_file_numbers, http_votes)
+            meeting_data["item_detail_urls"] = meeting["item_detail_urls"]
+            print(f"    Resources: {self.resource_filter.take_stats().summary()}")
 
             self.current_meeting_data = meeting_data
             return meeting_data
@@ -164,94 +185,34 @@ class WebScraper:
             print(f"    Error scraping meeting: {e}")
             return None
 
-    def _extract_link_href(self, text_pattern):
-        """Extract href from a link containing the text pattern."""
-        try:
-            links = self.page.query_selector_all("a")
-            for link in links:
-                text = link.text_content() or ""
-                if text_pattern.lower() in text.lower():
-                    href = link.get_attribute("href")
-                    if href and "View.ashx" in href:
-                        if href.startswith("/"):
-                            return WEBSITE_BASE + href
-                        return href
-        except:
-            pass
-        return ""
-
-    def _scrape_all_action_details(self):
+    def _scrape_all_action_details(self, meeting, skip_file_numbers=None, http_votes=False):
         """Scrape Action Details for all agenda items to get individual votes and item summaries."""
-        item_votes = {}
-        item_summaries = {}
-        item_detail_urls = {}
-        absent_members = set()
+        votes = MeetingVotes(meeting, skip_file_numbers)
 
         try:
-            # First, collect all file numbers and their detail URLs from the table
-            rows = self.page.query_selector_all("table tr")
-            for row in rows:
-                cells = row.query_selector_all("td")
-                if len(cells) >= 7:
-                    # First cell should have file number link
-                    file_link = cells[0].query_selector("a")
-                    if file_link:
-                        file_text = (file_link.text_content() or "").strip()
-                        if re.match(r'^\d{2}-\d+$', file_text):
-                            href = file_link.get_attribute("href")
-                            if href:
-                                # Make URL absolute
-                                if not href.startswith("http"):
-                                    if href.startswith("/"):
-                                        href = WEBSITE_BASE + href
-                                    else:
-                                        href = WEBSITE_BASE + "/" + href
-                                item_detail_urls[file_text] = href
-
-            # Find all Action details links - wait for table to fully load
-            self.page.wait_for_selector("table tr", timeout=10000)
-            time.sleep(3)  # Extra wait for dynamic content
-
-            # Use Playwright's locator API which handles text matching better
-            action_detail_links = self.page.locator("a:has-text('Action details')").all()
-            print(f"    Found {len(action_detail_links)} Action details links, {len(item_detail_urls)} item detail URLs")
-
-            # Click each action details link and extract vote data
-            for i, link in enumerate(action_detail_links[:100]):  # Limit to prevent infinite loops
+            # Votes straight from the HistoryDetail pages, no clicking
+            if http_votes:
+                urls_by_file = votes.http_targets()
+                fetched = fetch_action_detail_votes(urls_by_file, archive=self.archive)
+                print(f"    Fetched {len(fetched)} of {len(urls_by_file)} Action Details pages over HTTP")
+                votes.add_http_votes(fetched)
+
+            # Click each remaining Action details link and extract vote data
+            action_detail_links = self.page.locator(ACTION_DETAILS_SELECTOR)
+            print(f"    Found {len(meeting['action_files'])} Action details links, {len(meeting['item_detail_urls'])} item detail URLs")
+
+            for i, file_number in votes.popup_targets():
                 try:
-                    # Get the file number from the row before clicking
-                    row_text = link.evaluate("el => el.closest('tr')?.textContent || ''")
-                    agenda_match = re.search(r'(\d{2}-\d+)', row_text)
-                    file_number = agenda_match.group(1) if agenda_match else f"item_{i}"
-
-                    # Click to open popup
-                    link.click()
-                    time.sleep(0.8)
+                    # Click to open popup and wait for its iframe to load
+                    frame = page_waits.open_popup(self.page, action_detail_links.nth(i))
 
-                    # Wait for dialog/iframe to appear
-                    try:
-                        self.page.wait_for_selector("dialog, [role='dialog'], .RadWindow", timeout=5000)
-                    except:
-                        pass
+                    # Archive the raw popup, then extract its votes
+                    if self.archive:
+                        archive_popup(self.archive, self.page, meeting["actions"][i], file_number, frame)
+                    votes.add(file_number, read_popup_votes(self.page, file_number, frame))
 
-                    # Extract votes from the popup
-                    votes = self._extract_votes_from_popup()
-                    if votes:
-                        item_votes[file_number] = votes
-                        # Track absent members
-                        for member, vote in votes.items():
-                            if vote.lower() == "absent":
-                                absent_members.add(member)
-
-                    # Close the popup - try multiple selectors
-                    close_btn = self.page.locator("button:has-text('Close'), .rwCloseButton, [title='Close']").first
-                    try:
-                        close_btn.click(timeout=2000)
-                        time.sleep(0.3)
-                    except:
-                        # Try pressing Escape
-                        self.page.keyboard.press("Escape")
-                        time.sleep(0.3)
+                    # Close the popup (Close button, else Escape)
+                    page_waits.close_popup(self.page)
 
                 except Exception as e:
                     # Try to close any open popup
@@ -261,112 +222,16 @@ class WebScraper:
                         pass
 
             # Store the detail URLs for later summary scraping
-            self.item_detail_urls = item_detail_urls
+            self.item_detail_urls = meeting["item_detail_urls"]
 
-            return item_votes, absent_members
+            return votes.item_votes, votes.absent_members
 
         except Exception as e:
             print(f"    Error scraping action details: {e}")
             return {}, set()
 
-    def _extract_votes_from_popup(self):
-        """Extract individual votes from the action details popup."""
-        votes = {}
-        try:
-            # The popup contains an iframe with vote data
-            frames = self.page.frames
-            for frame in frames:
-                try:
-                    # Look for vote table rows
-                    rows = frame.query_selector_all("table tr")
-                    for row in rows:
-                        cells = row.query_selector_all("td")
-                        if len(cells) == 2:
-                            name = (cells[0].text_content() or "").strip()
-                            vote = (cells[1].text_content() or "").strip()
-                            if name and vote and name != "Person Name":
-                                votes[name] = vote
-                except:
-                    continue
-        except:
-            pass
-        return votes
-
-    def scrape_item_summary(self, file_detail_url):
-        """
-        Scrape the item detail page to get the full item summary/description.
-        File# links go to pages like: LegislationDetail.aspx?ID=...
-        """
-        if not file_detail_url:
-            return ""
-        try:
-            self.page.goto(file_detail_url, wait_until="networkidle", timeout=30000)
-            time.sleep(1)
-
-            # Look for Item Summary section
-            summary = ""
-
-            # Try to find the summary in various locations
-            # 1. Look for "Item Summary" tab/section and click it
-            summary_tab = self.page.query_selector("a:has-text('Item Summary')")
-            if summary_tab:
-                summary_tab.click()
-                time.sleep(0.5)
-
-            # 2. Extract all paragraphs and look for content after "Report Summary"
-            paragraphs = self.page.query_selector_all("p")
-            summary_parts = []
-            capture = False
-            found_report_summary = False
-
-            for p in paragraphs:
-                text = (p.text_content() or "").strip()
-
-                # Look for "Report" followed by "Summary" pattern (split across paragraphs)
-                if text == "Report":
-                    found_report_summary = True
-                    continue
-                if found_report_summary and text == "Summary":
-                    capture = True
-                    continue
-
-                # Also check for "Report Summary" in single text
-                if "Report Summary" in text:
-                    capture = True
-                    continue
-
-                # Capture meaningful content (skip short labels like "Department")
-                if capture and text and len(text) > 20:
-                    # Skip section headers
-                    if text in ["Department", "Responsible Department", "Title"]:
-                        continue
-                    summary_parts.append(text)
-                    if len(summary_parts) >= 5:  # Get more content
-                        break
-
-            summary = " ".join(summary_parts)
-
-            # If still no summary, try getting all paragraph text after Item Summary tab area
-            if not summary:
-                # Get text from the detail content area
-                all_text = []
-                for p in paragraphs:
-                    text = (p.text_content() or "").strip()
-                    if text and len(text) > 30 and text not in ["Title", "Report", "Summary", "Department", "Responsible Department"]:
-                        all_text.append(text)
-                if all_text:
-                    summary = " ".join(all_text[:3])
-
-            if summary:
-                print(f"        -> Found summary ({len(summary)} chars)")
-            return summary[:2000]  # Limit length
 
-        except Exception as e:
-            print(f"        -> Error: {e}")
-            return ""
-
-
-def build_row(event, item, council_members, absent_members=None, item_votes=None, meeting_data=None, item_summary=""):
+def build_row(event, item, council_members, absent_members=None, item_votes=None, meeting_data=None, item_summary="", matter_indexes=None):
     """Build a CSV row from event, item, and scraped data."""
     absent_members = absent_members or set()
     item_votes = item_votes or {}
@@ -414,8 +279,9 @@ def build_row(event, item, council_members, absent_members=None, item_votes=None
 
         council_votes.append(vote)
 
-    # Extract index/district
-    index_name = extract_index_from_title(item.get("EventItemTitle", ""))
+    # Index/district from the matter record; fall back to guessing from the title
+    index_name = (matter_indexes or {}).get(item.get("EventItemMatterId")) or \
+        extract_index_from_title(item.get("EventItemTitle", ""))
 
     # Use scraped document URLs if available - ensure full URLs
     agenda_url = meeting_data.get("agenda_url", "") or event.get("EventAgendaFile", "") or ""
@@ -477,14 +343,31 @@ def main():
     parser.add_argument('--start-month', type=int, default=1, help='Start month (1-12)')
     parser.add_argument('--end-month', type=int, default=4, help='End month (1-12, exclusive)')
     parser.add_argument('--scrape-summaries', action='store_true',
-                        help='Also scrape item summaries from detail pages (slow)')
+                        help='Also scrape item summaries from detail pages (cached by file number)')
+    parser.add_argument('--summary-mode', choices=['http', 'browser'], default='http',
+                        help='Read detail pages over plain HTTP or with a browser page pool (default: http)')
+    parser.add_argument('--summary-pages', type=int, default=DEFAULT_PAGES,
+                        help=f'Concurrent browser pages for --summary-mode browser (default: {DEFAULT_PAGES})')
     parser.add_argument('--output', type=str,
                         default="/Users/michaelingram/Documents/GitHub/PhoenixCityCouncil/phoenix_council_2024_Q1_enhanced.csv",
                         help='Output CSV file path')
     parser.add_argument('--headed', action='store_true',
                         help='Run browser in headed mode (visible window)')
+    parser.add_argument('--http-votes', action='store_true',
+                        help='Fetch Action Details (HistoryDetail) pages over HTTP instead of clicking popups')
+    parser.add_argument('--allow-resources', type=str, default=DEFAULT_ALLOW,
+                        help='Comma separated resource types / URL substrings not to block ("all" disables blocking)')
+    parser.add_argument('--archive-html', action='store_true',
+                        help='Save raw meeting, Action Details and item detail pages to the compressed HTML archive')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip meetings finished by an earlier (interrupted) run and unchanged since')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Bypass the on-disk API response cache')
     args = parser.parse_args()
 
+    if args.no_cache:
+        set_cache_enabled(False)
+
     council_members = COUNCIL_MEMBERS_2024
 
     # CSV headers
@@ -509,11 +392,34 @@ def main():
         print("No events found!")
         return
 
+    # Meetings checkpointed by an earlier run (and unchanged since) are not redone
+    checkpoints = get_checkpoint_store()
+    resumed = checkpoints.get_many(CHECKPOINT_NAME, events) if args.resume else {}
+    pending = [event for event in events if event.get("EventId") not in resumed]
+    if args.resume:
+        print(f"  Resuming: {len(resumed)} meetings already done, {len(pending)} to process")
+
+    # Fetch agenda items for every meeting up front (concurrent, pooled connections)
+    items_by_event = get_event_items_many(pending) if pending else {}
+    pending_items = [item for items in items_by_event.values() for item in items or []]
+    for event_id, checkpoint in resumed.items():
+        items_by_event[event_id] = checkpoint["items"]
+
+    # Individual votes from the API; popups are only clicked for items it lacks
+    all_items = [item for items in items_by_event.values() for item in items or []]
+    votes_by_item = get_votes_many(pending_items)
+    print(f"  API votes found for {len(votes_by_item)} of {len(pending_items)} agenda items")
+
+    # Authoritative district/index for every matter on the agendas
+    matter_indexes = get_matter_index_names(item.get("EventItemMatterId") for item in all_items)
+
     # Initialize web scraper
     scraper = WebScraper()
-    scraper.start(headless=not args.headed)
+    if pending:
+        scraper.start(headless=not args.headed, allow_resources=parse_allowlist(args.allow_resources),
+                      archive=args.archive_html)
 
-    all_rows = []
+    meetings = []
 
     try:
         for i, event in enumerate(events):
@@ -523,54 +429,50 @@ def main():
 
             print(f"\nProcessing event {i+1}/{len(events)}: {event_date} (ID: {event_id})")
 
-            # Scrape meeting page for document URLs and individual votes
+            # Get event items from API (prefetched above; None if that failed)
+            items = items_by_event.get(event_id)
+            items_failed = items is None
+            items = items or []
+
+            # Finished by an earlier run
+            if event_id in resumed:
+                checkpoint = resumed[event_id]
+                meetings.append((event, items, checkpoint["meeting_data"],
+                                 set(checkpoint["absent_members"]), checkpoint["item_votes"]))
+                print(f"    Resumed from checkpoint ({len(items)} agenda items)")
+                continue
+
+            api_item_votes, api_absent = get_api_item_votes(items, list(NAME_MAPPING_2024), votes_by_item)
+
+            # Scrape meeting page for document URLs and any votes the API lacked
             meeting_data = None
             if meeting_url:
-                meeting_data = scraper.scrape_meeting(meeting_url)
+                meeting_data = scraper.scrape_meeting(meeting_url, skip_file_numbers=set(api_item_votes),
+                                                      http_votes=args.http_votes)
 
-            # Get absent members from scraped data
-            absent_members = set()
+            # Get absent members from API votes and scraped data
+            absent_members = set(api_absent)
             item_votes = {}
-            item_detail_urls = {}
             if meeting_data:
-                absent_members = meeting_data.get("absent_members", set())
+                absent_members |= meeting_data.get("absent_members", set())
                 item_votes = meeting_data.get("item_votes", {})
-                item_detail_urls = meeting_data.get("item_detail_urls", {})
-                if absent_members:
-                    print(f"    Absent members: {', '.join(absent_members)}")
+            item_votes.update(api_item_votes)
+            if absent_members:
+                print(f"    Absent members: {', '.join(absent_members)}")
 
-            # Get event items from API
-            items = get_event_items(event_id)
             print(f"    Found {len(items)} agenda items")
-
-            for j, item in enumerate(items):
-                # Get file number for this item
-                file_number = item.get("EventItemMatterFile", "") or ""
-                if not file_number:
-                    title = item.get("EventItemTitle", "") or ""
-                    match = re.search(r'(\d{2}-\d+)', title)
-                    if match:
-                        file_number = match.group(1)
-
-                # Optionally scrape item summary from detail page
-                item_summary = ""
-                if args.scrape_summaries and file_number and file_number in item_detail_urls:
-                    detail_url = item_detail_urls[file_number]
-                    print(f"      Scraping summary for {file_number}...")
-                    # Need to navigate back to meeting page after getting summary
-                    item_summary = scraper.scrape_item_summary(detail_url)
-                    # Navigate back to meeting page for next item
-                    if j < len(items) - 1:  # Only if more items to process
-                        scraper.page.goto(meeting_url, wait_until="networkidle", timeout=60000)
-
-                row = build_row(
-                    event, item, council_members,
-                    absent_members=absent_members,
-                    item_votes=item_votes,
-                    meeting_data=meeting_data,
-                    item_summary=item_summary
-                )
-                all_rows.append(row)
+            meetings.append((event, items, meeting_data, absent_members, item_votes))
+
+            # Checkpoint unless the items or the meeting page failed (--resume retries it)
+            if not items_failed and (meeting_data is not None or not meeting_url):
+                checkpoints.put(CHECKPOINT_NAME, event, {
+                    "items": items,
+                    "meeting_data": meeting_data and dict(
+                        meeting_data, absent_members=sorted(meeting_data["absent_members"])
+                    ),
+                    "absent_members": sorted(absent_members),
+                    "item_votes": item_votes
+                })
 
             # Small delay between meetings
             time.sleep(1)
@@ -578,6 +480,35 @@ def main():
     finally:
         scraper.stop()
 
+    # Item summaries as a separate stage over every item's detail page
+    summaries = {}
+    if args.scrape_summaries:
+        urls_by_file = {}
+        for event, items, meeting_data, _, _ in meetings:
+            item_detail_urls = (meeting_data or {}).get("item_detail_urls", {})
+            for item in items:
+                file_number = get_file_number(item)
+                if file_number in item_detail_urls:
+                    urls_by_file[file_number] = item_detail_urls[file_number]
+        summaries = get_item_summaries(
+            urls_by_file, mode=args.summary_mode, pages=args.summary_pages,
+            headless=not args.headed, allow_resources=parse_allowlist(args.allow_resources),
+            archive=get_archive() if args.archive_html else None
+        )
+
+    all_rows = []
+    for event, items, meeting_data, absent_members, item_votes in meetings:
+        for item in items:
+            row = build_row(
+                event, item, council_members,
+                absent_members=absent_members,
+                item_votes=item_votes,
+                meeting_data=meeting_data,
+                item_summary=summaries.get(get_file_number(item), ""),
+                matter_indexes=matter_indexes
+            )
+            all_rows.append(row)
+
     # Write CSV
     with open(args.output, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
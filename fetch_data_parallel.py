@@ -4,25 +4,94 @@ Parallelized Phoenix City Council meeting data fetcher.
 Combines API data with website scraping for complete vote information.
 
 Features:
-- Parallel processing using multiprocessing (separate browser per process)
-- Configurable number of workers
+- Parallel processing using multiprocessing (one long-lived browser per worker
+  process, a fresh browser context per meeting, relaunched every N meetings)
+- Agenda items for all meetings prefetched concurrently over pooled connections
+  (--api-concurrency N: on the asyncio client, N requests in flight)
+- Configurable number of workers; --workers auto sizes the pool from CPU and
+  memory and adapts meetings in flight to throughput and failures (with
+  --engine async it sizes the page pool instead, unless --pages is given)
 - Supports both 2020 and 2024 council rosters
+- --since-last-run: only re-fetch/re-scrape meetings changed since the last run
+- Individual votes taken from the API first; popups only clicked for items the API lacks
+- --from YYYY-MM --to YYYY-MM: multi-year backfills with concurrent monthly discovery
+- --engine async: one browser driving many pages concurrently (lower memory than workers)
+- --http-votes: Action Details pages fetched and parsed directly instead of clicked
+- Images, fonts, stylesheets and analytics blocked (--allow-resources to let them through)
+- --archive-html: raw meeting / Action Details pages saved to a compressed archive;
+  --from-archive rebuilds the CSV from that archive without a browser
+- Results streamed as meetings finish: rows flushed to <output>.partial, then
+  sorted by date into the final CSV
+- Every finished meeting checkpointed; --resume skips meetings already done
+- Longest-expected-first scheduling: meetings dispatched by estimated cost to
+  whichever worker is free next
+- --engine pipeline: API, scrape, row-build and write stages on bounded queues,
+  each sized on its own, with backpressure metrics (see pipeline.py)
+- --job-queue PATH: meetings spread over several machines through a shared
+  SQLite job queue with leases and heartbeats (see job_queue.py)
+- Timing spans per stage (event discovery, agenda items, page load, each
+  popup, row building, CSV writes); --trace writes them as JSONL and
+  --metrics a Prometheus textfile with p50/p95/p99, retries and bytes
 
 Performance: ~2-3x faster than sequential version
 """
 
-import requests
+import os
 import csv
 import time
+import queue
 import re
 import argparse
+import threading
 from datetime import datetime
-from multiprocessing import Pool, cpu_count
+from multiprocessing import Pool, cpu_count, current_process
+from multiprocessing.util import Finalize
 from playwright.sync_api import sync_playwright
 
+from legistar_api import (
+    MAX_WORKERS, fetch_json, get_event_items_many, set_cache_enabled, set_async_concurrency,
+    get_modified_events, get_modified_item_event_ids, get_events_by_id,
+    get_votes_many, get_api_item_votes, get_matter_index_names,
+    get_events_sharded, month_shards, get_file_number
+)
+from sync_state import load_watermark, save_watermark, newest_modified, get_checkpoint_store
+from action_details import fetch_action_detail_votes, read_popup_votes, archive_popup
+from meeting_page import ACTION_DETAILS_SELECTOR, snapshot_meeting
+from meeting_scrape import MeetingVotes
+import page_waits
+import run_metrics
+from rate_limit import share_rate
+from resource_filter import ResourceFilter, parse_allowlist, DEFAULT_ALLOW
+from html_archive import get_archive, rebuild_meeting_data
+from autoscale import auto_worker_count, ConcurrencyController
+from job_queue import JobQueue, worker_name, HEARTBEAT_SECONDS, MAX_ATTEMPTS, POLL_SECONDS
+
 BASE_URL = "https://webapi.legistar.com/v1/phoenix"
 WEBSITE_BASE = "https://phoenix.legistar.com"
 
+# Legistar body for City Council Formal Meetings
+FORMAL_BODY_ID = 138
+
+# Meetings a worker's browser handles before it is relaunched (caps memory growth)
+BROWSER_RECYCLE_AFTER = 20
+
+# Seconds a queue worker waits for one meeting before giving its lease back
+# (a pool process that dies hard never reports its meeting as done or failed)
+MEETING_TIMEOUT = 1800
+
+# Concurrent pages of the async engine when neither --pages nor --workers auto is given
+DEFAULT_PAGES = 8
+
+# Namespace of this fetcher's checkpoints (sync_state.get_checkpoint_store)
+CHECKPOINT_NAME = "fetch_data_parallel"
+
+# Relative cost of a meeting for scheduling: page load, each agenda item row,
+# and each Action details popup that will be clicked (or fetched, --http-votes)
+MEETING_COST = 10
+ITEM_COST = 0.2
+POPUP_COST = 3
+HTTP_ACTION_COST = 0.5
+
 # Council rosters by year
 # Note: Phoenix council elections are staggered - odd districts (1,3,5,7) elect in one cycle,
 # even districts (2,4,6,8) in another, with Mayor every 4 years
@@ -176,24 +245,11 @@ COUNCIL_ROSTERS = {
 }
 
 
-def fetch_json(url, retries=3):
-    """Fetch JSON from URL with retry logic."""
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            if attempt < retries - 1:
-                time.sleep(1)
-    return None
-
-
 def get_events(year, start_month=1, end_month=4):
     """Get City Council Formal Meeting events for specified period."""
     start_date = f"{year}-{start_month:02d}-01"
     end_date = f"{year}-{end_month:02d}-01"
-    url = f"{BASE_URL}/events?$filter=EventBodyId eq 138 and EventDate ge datetime'{start_date}' and EventDate lt datetime'{end_date}'&$orderby=EventDate asc"
+    url = f"{BASE_URL}/events?$filter=EventBodyId eq {FORMAL_BODY_ID} and EventDate ge datetime'{start_date}' and EventDate lt datetime'{end_date}'&$orderby=EventDate asc"
     print(f"Fetching events from {start_date} to {end_date}...")
     events = fetch_json(url)
     if events:
@@ -201,10 +257,37 @@ def get_events(year, start_month=1, end_month=4):
     return events or []
 
 
-def get_event_items(event_id):
-    """Get all agenda items for an event."""
-    url = f"{BASE_URL}/events/{event_id}/eventitems"
-    return fetch_json(url) or []
+def get_changed_events(start_date, end_date, since):
+    """
+    Get meetings in [start_date, end_date) that changed after the `since` watermark.
+
+    A meeting counts as changed if its own EventLastModifiedUtc or any of its
+    agenda items' EventItemLastModifiedUtc is newer than the watermark.
+    Returns (events, newest timestamp seen), or (None, since) if the API
+    could not be queried.
+    """
+    print(f"Checking for changes since {since}...")
+
+    modified_events = get_modified_events(FORMAL_BODY_ID, since)
+    item_event_ids, newest_item = get_modified_item_event_ids(since)
+    if modified_events is None or item_event_ids is None:
+        return None, since
+
+    events_by_id = {event.get("EventId"): event for event in modified_events}
+    missing_ids = [event_id for event_id in item_event_ids if event_id not in events_by_id]
+    for event in get_events_by_id(missing_ids):
+        if event.get("EventBodyId") == FORMAL_BODY_ID:
+            events_by_id[event.get("EventId")] = event
+
+    newest = max(newest_modified(modified_events, "EventLastModifiedUtc", since), newest_item)
+
+    events = [
+        event for event in events_by_id.values()
+        if start_date <= (event.get("EventDate") or "")[:10] < end_date
+    ]
+    events.sort(key=lambda event: event.get("EventDate") or "")
+    print(f"  {len(events)} meetings changed in {start_date} to {end_date}")
+    return events, newest
 
 
 def format_date(date_str):
@@ -230,126 +313,50 @@ def extract_index_from_title(title):
     return ""
 
 
-def extract_link_href(page, text_pattern):
-    """Extract href from a link containing the text pattern."""
-    try:
-        links = page.query_selector_all("a")
-        for link in links:
-            text = link.text_content() or ""
-            if text_pattern.lower() in text.lower():
-                href = link.get_attribute("href")
-                if href and "View.ashx" in href:
-                    if href.startswith("/"):
-                        return WEBSITE_BASE + href
-                    return href
-    except:
-        pass
-    return ""
-
-
-def extract_votes_from_popup(page):
-    """Extract individual votes from the action details popup."""
-    votes = {}
-    try:
-        frames = page.frames
-        for frame in frames:
-            try:
-                rows = frame.query_selector_all("table tr")
-                for row in rows:
-                    cells = row.query_selector_all("td")
-                    if len(cells) == 2:
-                        name = (cells[0].text_content() or "").strip()
-                        vote = (cells[1].text_content() or "").strip()
-                        if name and vote and name != "Person Name":
-                            votes[name] = vote
-            except:
-                continue
-    except:
-        pass
-    return votes
-
-
-def scrape_meeting(page, meeting_url):
+def scrape_meeting(page, meeting_url, skip_file_numbers=None, http_votes=False, archive=None):
     """
     Scrape a meeting page to get:
     - Document URLs (Agenda, Minutes, Results)
     - Individual votes for each agenda item
     - Absent members
+
+    Action Details popups are not opened for file numbers in skip_file_numbers
+    (items whose votes already came from the API). With http_votes, the
+    HistoryDetail pages behind the popups are fetched directly and popups are
+    only clicked for pages that could not be downloaded. With an archive
+    (html_archive.HtmlArchive), the rendered meeting page and every Action
+    Details page read are saved to it.
     """
     try:
-        page.goto(meeting_url, wait_until="networkidle", timeout=60000)
-        time.sleep(1.5)
-
-        meeting_data = {
-            "agenda_url": "",
-            "minutes_url": "",
-            "results_url": "",
-            "item_votes": {},
-            "item_detail_urls": {},
-            "absent_members": set()
-        }
-
-        # Extract document URLs
-        meeting_data["agenda_url"] = extract_link_href(page, "Agenda")
-        meeting_data["minutes_url"] = extract_link_href(page, "Minutes")
-        meeting_data["results_url"] = extract_link_href(page, "Results")
-
-        # Get all agenda items and their action details
-        item_votes = {}
-        item_detail_urls = {}
-        absent_members = set()
-
-        # Collect file numbers and detail URLs
-        rows = page.query_selector_all("table tr")
-        for row in rows:
-            cells = row.query_selector_all("td")
-            if len(cells) >= 7:
-                file_link = cells[0].query_selector("a")
-                if file_link:
-                    file_text = (file_link.text_content() or "").strip()
-                    if re.match(r'^\d{2}-\d+$', file_text):
-                        href = file_link.get_attribute("href")
-                        if href:
-                            if not href.startswith("http"):
-                                href = WEBSITE_BASE + ("/" if not href.startswith("/") else "") + href.lstrip("/")
-                            item_detail_urls[file_text] = href
-
-        # Find Action details links
-        page.wait_for_selector("table tr", timeout=10000)
-        time.sleep(2)
-
-        action_detail_links = page.locator("a:has-text('Action details')").all()
-
-        # Click each and extract votes
-        for i, link in enumerate(action_detail_links[:100]):
+        with run_metrics.span("page_goto", url=meeting_url):
+            page_waits.goto(page, meeting_url, ready_selector=page_waits.MEETING_READY_SELECTOR)
+
+        # Links, grid rows and Action details targets in one round trip
+        meeting = snapshot_meeting(page)
+        if archive:
+            archive.put(meeting_url, page.content(), "meeting")
+        votes = MeetingVotes(meeting, skip_file_numbers)
+
+        # Votes straight from the HistoryDetail pages, no clicking
+        if http_votes:
+            urls_by_file = votes.http_targets()
+            with run_metrics.span("action_details_http", pages=len(urls_by_file)):
+                votes.add_http_votes(fetch_action_detail_votes(urls_by_file, archive=archive))
+
+        # Click each remaining Action details link and extract votes
+        action_detail_links = page.locator(ACTION_DETAILS_SELECTOR)
+        for i, file_number in votes.popup_targets():
             try:
-                row_text = link.evaluate("el => el.closest('tr')?.textContent || ''")
-                agenda_match = re.search(r'(\d{2}-\d+)', row_text)
-                file_number = agenda_match.group(1) if agenda_match else f"item_{i}"
-
-                link.click()
-                time.sleep(0.6)
-
-                try:
-                    page.wait_for_selector("dialog, [role='dialog'], .RadWindow", timeout=3000)
-                except:
-                    pass
+                with run_metrics.span("action_popup", file_number=file_number):
+                    frame = page_waits.open_popup(page, action_detail_links.nth(i))
 
-                votes = extract_votes_from_popup(page)
-                if votes:
-                    item_votes[file_number] = votes
-                    for member, vote in votes.items():
-                        if vote.lower() == "absent":
-                            absent_members.add(member)
+                    # Raw popup first, so pages the parser gets nothing from can be replayed
+                    if archive:
+                        archive_popup(archive, page, meeting["actions"][i], file_number, frame)
+                    votes.add(file_number, read_popup_votes(page, file_number, frame))
 
-                # Close popup
-                try:
-                    close_btn = page.locator("button:has-text('Close'), .rwCloseButton, [title='Close']").first
-                    close_btn.click(timeout=1500)
-                    time.sleep(0.2)
-                except:
-                    page.keyboard.press("Escape")
-                    time.sleep(0.2)
+                    # Close popup
+                    page_waits.close_popup(page)
 
             except Exception:
                 try:
@@ -357,64 +364,522 @@ def scrape_meeting(page, meeting_url):
                 except:
                     pass
 
-        meeting_data["item_votes"] = item_votes
-        meeting_data["item_detail_urls"] = item_detail_urls
-        meeting_data["absent_members"] = absent_members
-
-        return meeting_data
+        return votes.meeting_data()
 
     except Exception as e:
         print(f"    Error scraping meeting: {e}")
         return None
 
 
+# Per-process browser state, set up by init_browser_worker
+_worker_browser = {}
+
+
+def init_browser_worker(headless=True, recycle_after=BROWSER_RECYCLE_AFTER, workers=1):
+    """
+    Pool initializer: start the long-lived browser for this worker process.
+
+    The browser is closed when the worker exits (pool.close() + join()).
+    The pool's `workers` processes split the Legistar request rate.
+    """
+    # Spans inherited from the parent on fork were already recorded there
+    run_metrics.reset()
+    share_rate(workers)
+    _worker_browser.update(
+        headless=headless,
+        recycle_after=recycle_after,
+        playwright=sync_playwright().start(),
+        browser=None,
+        meetings=0
+    )
+    _launch_worker_browser()
+    Finalize(None, close_worker_browser, exitpriority=10)
+
+
+def _launch_worker_browser():
+    """(Re)launch this worker's Chromium."""
+    state = _worker_browser
+    if state["browser"]:
+        try:
+            state["browser"].close()
+        except Exception:
+            pass
+    state["browser"] = state["playwright"].chromium.launch(headless=state["headless"])
+    state["meetings"] = 0
+
+
+def get_worker_browser(headless=True):
+    """
+    Return this worker's browser, relaunching it if it crashed or has
+    handled recycle_after meetings.
+    """
+    state = _worker_browser
+    if not state:
+        init_browser_worker(headless)
+    elif not state["browser"].is_connected() or state["meetings"] >= state["recycle_after"]:
+        _launch_worker_browser()
+    state["meetings"] += 1
+    return state["browser"]
+
+
+def close_worker_browser():
+    """Shut down this worker's browser and Playwright driver."""
+    state = _worker_browser
+    if not state:
+        return
+    try:
+        if state["browser"]:
+            state["browser"].close()
+        state["playwright"].stop()
+    except Exception:
+        pass
+    state.clear()
+
+
+def assemble_result(event, items, api_votes, meeting_data):
+    """
+    Combine scraped meeting data with the API votes into a worker result.
+    Shared by the process-pool and async engines.
+
+    items is None if the agenda items could not be fetched. The result is
+    "complete" unless that happened or the meeting page had to be scraped
+    and could not be; incomplete results are not checkpointed, so --resume
+    retries them.
+    """
+    api_item_votes, api_absent_members = api_votes
+    complete = items is not None and (meeting_data is not None or not event.get("EventInSiteURL"))
+    items = items or []
+
+    # API votes take precedence; popups only filled in the items the API lacked
+    if api_item_votes:
+        if meeting_data is None:
+            meeting_data = {
+                "agenda_url": "",
+                "minutes_url": "",
+                "results_url": "",
+                "item_votes": {},
+                "item_detail_urls": {},
+                "absent_members": set()
+            }
+        meeting_data["item_votes"].update(api_item_votes)
+        meeting_data["absent_members"] = set(meeting_data["absent_members"]) | set(api_absent_members)
+
+    # Convert set to list for pickling
+    if meeting_data and "absent_members" in meeting_data:
+        meeting_data["absent_members"] = list(meeting_data["absent_members"])
+
+    return {
+        "event": event,
+        "items": items,
+        "meeting_data": meeting_data,
+        "event_date": format_date(event.get("EventDate")),
+        "complete": complete
+    }
+
+
 def process_meeting_worker(args):
     """
     Worker function that processes a single meeting.
-    Each worker creates its own browser instance.
+    Reuses the worker's browser; each meeting gets a fresh browser context.
+    If the context cannot be set up, the result has API data only.
     """
-    event, worker_id, headless = args
+    event, items, api_votes, cost, options = args
 
     event_id = event.get("EventId")
     event_date = format_date(event.get("EventDate"))
     meeting_url = event.get("EventInSiteURL", "")
+    worker_id = current_process().name.rsplit("-", 1)[-1]
 
-    print(f"  [Worker {worker_id}] Processing: {event_date} (ID: {event_id})")
-
-    # Create browser for this worker
-    playwright = sync_playwright().start()
-    browser = playwright.chromium.launch(headless=headless)
-    page = browser.new_page()
+    print(f"  [Worker {worker_id}] Processing: {event_date} (ID: {event_id}, est. cost {cost:.0f})")
 
+    # Fresh, isolated context on the long-lived browser
+    context = None
     try:
-        # Scrape meeting page
-        meeting_data = None
-        if meeting_url:
-            meeting_data = scrape_meeting(page, meeting_url)
-
-        # Convert set to list for pickling
-        if meeting_data and "absent_members" in meeting_data:
-            meeting_data["absent_members"] = list(meeting_data["absent_members"])
-
-        # Get event items from API
-        items = get_event_items(event_id)
-
-        result = {
-            "event": event,
-            "items": items,
-            "meeting_data": meeting_data,
-            "event_date": event_date
-        }
+        browser = get_worker_browser(options["headless"])
+        context = browser.new_context()
+        resource_filter = ResourceFilter(options["allow_resources"])
+        resource_filter.install(context)
+        page = context.new_page()
+    except Exception as e:
+        # Same as a failed scrape: API data only, and a fresh browser next time
+        print(f"  [Worker {worker_id}] Browser setup failed for {event_date}: {e}")
+        if context is not None:
+            try:
+                context.close()
+            except Exception:
+                pass
+        if _worker_browser:
+            _worker_browser["meetings"] = _worker_browser["recycle_after"]
+        result = assemble_result(event, items, api_votes, None)
+        result["metrics"] = run_metrics.take()
+        return result
 
-        print(f"  [Worker {worker_id}] Completed: {event_date} ({len(items)} items)")
+    try:
+        with run_metrics.span("meeting", event_id=event_id):
+            # Scrape meeting page
+            meeting_data = None
+            if meeting_url:
+                meeting_data = scrape_meeting(page, meeting_url, skip_file_numbers=set(api_votes[0]),
+                                              http_votes=options["http_votes"],
+                                              archive=get_archive() if options["archive"] else None)
+
+            result = assemble_result(event, items, api_votes, meeting_data)
+        stats = resource_filter.take_stats()
+        run_metrics.count("browser_bytes", stats.loaded_bytes)
+        print(f"  [Worker {worker_id}] Completed: {event_date} ({len(result['items'])} items; "
+              f"{stats.summary()})")
+        # This process's spans and counters travel back with the result
+        result["metrics"] = run_metrics.take()
         return result
 
     finally:
-        browser.close()
-        playwright.stop()
+        context.close()
+
 
+def estimate_meeting_cost(event, items, api_votes, http_votes=False):
+    """
+    Estimate how long a meeting takes to scrape, in relative units.
 
-def build_row(event, item, council_members, name_mapping, absent_members=None, item_votes=None, meeting_data=None):
+    Dominated by the Action details popups: one per agenda item that had an
+    action taken but no votes from the API. Meetings without a page only
+    cost their API work.
+    """
+    if not event.get("EventInSiteURL"):
+        return 0
+    items = items or []
+    api_item_votes = api_votes[0]
+    actions = sum(
+        1 for item in items
+        if item.get("EventItemActionName") and get_file_number(item) not in api_item_votes
+    )
+    action_cost = HTTP_ACTION_COST if http_votes else POPUP_COST
+    return MEETING_COST + ITEM_COST * len(items) + action_cost * actions
+
+
+def schedule_meetings(worker_args, workers):
+    """
+    Order worker_args longest-expected-first (cost in slot 3).
+
+    The pool hands the next meeting to whichever worker frees up first
+    (imap_unordered, chunksize 1), so big meetings start early and the small
+    ones fill the gaps at the end instead of one big meeting running alone.
+    """
+    scheduled = sorted(worker_args, key=lambda args: args[3], reverse=True)
+    if scheduled:
+        total = sum(args[3] for args in scheduled)
+        largest = scheduled[0][3]
+        print(f"  Scheduled {len(scheduled)} meetings by estimated cost "
+              f"(total {total:.0f}, largest {largest:.0f}, "
+              f"best possible makespan {max(largest, total / max(1, workers)):.0f})")
+    return scheduled
+
+
+def run_process_engine(worker_args, workers, headless, recycle_after, on_result, controller=None):
+    """
+    Scrape meetings in a pool of worker processes (one long-lived browser
+    each), passing each worker result to on_result as soon as it finishes.
+    Meetings are handed out one at a time, in worker_args order; with a
+    controller (autoscale.ConcurrencyController), only controller.limit of
+    them are in flight at once.
+    """
+    with Pool(processes=workers, initializer=init_browser_worker,
+              initargs=(headless, recycle_after, workers)) as pool:
+        if controller is None:
+            for result in pool.imap_unordered(process_meeting_worker, worker_args, chunksize=1):
+                if result is not None:
+                    on_result(result)
+        else:
+            _run_adaptive(pool, worker_args, controller, on_result)
+        # Let workers exit normally so their browsers shut down cleanly
+        pool.close()
+        pool.join()
+
+
+def _run_adaptive(pool, worker_args, controller, on_result):
+    """Feed the pool while respecting the controller's changing limit."""
+    done = queue.Queue()
+    remaining = iter(worker_args)
+    in_flight = 0
+    exhausted = False
+
+    def submit(args):
+        pool.apply_async(process_meeting_worker, (args,),
+                         callback=lambda result: done.put((args, result, None)),
+                         error_callback=lambda error: done.put((args, None, error)))
+
+    while True:
+        while not exhausted and in_flight < controller.limit:
+            args = next(remaining, None)
+            if args is None:
+                exhausted = True
+            else:
+                submit(args)
+                in_flight += 1
+        if in_flight == 0:
+            break
+
+        args, result, error = done.get()
+        in_flight -= 1
+        if error is not None:
+            event, items, api_votes, *_ = args
+            print(f"    Error scraping meeting {event.get('EventId')}: {error}")
+            result = assemble_result(event, items, api_votes, None)
+        controller.record(bool(result.get("complete")))
+        on_result(result)
+
+
+def run_async_engine(worker_args, pages, options, on_result):
+    """
+    Scrape every meeting in one browser with `pages` concurrent contexts
+    (see async_scraper.py), passing each worker result to on_result as soon
+    as its meeting finishes. Meetings start in worker_args order as pages
+    free up (the semaphore wakes waiters first-in, first-out).
+    """
+    from async_scraper import run_scrape_meetings
+
+    pending = {}
+    jobs = []
+    for event, items, api_votes, *_ in worker_args:
+        if event.get("EventInSiteURL"):
+            pending[event.get("EventId")] = (event, items, api_votes)
+            jobs.append((event.get("EventId"), event.get("EventInSiteURL"), set(api_votes[0])))
+        else:
+            on_result(assemble_result(event, items, api_votes, None))
+
+    def finished(event_id, meeting_data):
+        on_result(assemble_result(*pending.pop(event_id), meeting_data))
+
+    run_scrape_meetings(jobs, concurrency=pages, headless=options["headless"],
+                        http_votes=options["http_votes"], allow_resources=options["allow_resources"],
+                        archive=options["archive"], on_result=finished)
+
+
+def run_archive_engine(worker_args, on_result):
+    """
+    Rebuild every meeting's scraped data from the raw HTML archive (no
+    browser), passing each worker result to on_result. Meetings never
+    archived get API data only.
+    """
+    missing = 0
+    for event, items, api_votes, *_ in worker_args:
+        meeting_url = event.get("EventInSiteURL")
+        meeting_data = rebuild_meeting_data(meeting_url) if meeting_url else None
+        if meeting_data is None:
+            missing += 1
+        on_result(assemble_result(event, items, api_votes, meeting_data))
+    print(f"  Rebuilt {len(worker_args) - missing} meetings from the HTML archive ({missing} not archived)")
+
+
+def run_pipeline_engine(events, options, stage_sizes, matter_indexes, refresh, on_rows):
+    """
+    Process meetings through the staged engine (pipeline.py):
+    api (per-meeting items, votes, matter indexes) -> scrape (worker
+    browsers) -> build (CSV rows) -> write (on_rows(result, rows)).
+
+    matter_indexes is filled in by the api stage as it goes, for the build
+    stage and anything written later. stage_sizes holds the number of api,
+    scrape and build workers and the queue size.
+
+    A meeting whose api stage fails, or whose items could not be fetched, is
+    still scraped (without items, so its result is incomplete); one whose rows cannot be built is passed on as
+    incomplete with no rows. Returns the number of meetings dropped by a
+    stage (never passed to on_rows), so the caller can hold back the sync
+    watermark.
+    """
+    from pipeline import Stage, run_pipeline
+
+    # The api threads share the pooled session's MAX_WORKERS connections, so
+    # each one's concurrent lookups get only their share of them
+    call_workers = max(1, MAX_WORKERS // stage_sizes["api"])
+
+    def fetch_api(event):
+        event_id = event.get("EventId")
+        with run_metrics.span("get_event_items", event_id=event_id):
+            items = get_event_items_many([event], max_workers=call_workers, refresh=refresh,
+                                         bulk=False).get(event_id)
+        name_mapping = COUNCIL_ROSTERS[event_year(event)]["mapping"]
+        votes_by_item = get_votes_many(items or [], max_workers=call_workers)
+        api_item_votes, api_absent = get_api_item_votes(items or [], list(name_mapping), votes_by_item)
+        matter_indexes.update(get_matter_index_names((item.get("EventItemMatterId") for item in items or []),
+                                                     max_workers=call_workers))
+        api_votes = (api_item_votes, sorted(api_absent))
+        cost = estimate_meeting_cost(event, items, api_votes, http_votes=options["http_votes"])
+        return (event, items, api_votes, cost, options)
+
+    def fetch_api_failed(event):
+        return (event, None, ({}, []), estimate_meeting_cost(event, None, ({}, [])), options)
+
+    with Pool(processes=stage_sizes["scrape"], initializer=init_browser_worker,
+              initargs=(options["headless"], options["recycle_after"], stage_sizes["scrape"])) as pool:
+
+        def scrape(worker_args):
+            # One thread per worker process, each waiting on its own meeting
+            try:
+                return pool.apply(process_meeting_worker, (worker_args,))
+            except Exception as e:
+                event, items, api_votes, *_ = worker_args
+                print(f"    Error scraping meeting {event.get('EventId')}: {e}")
+                return assemble_result(event, items, api_votes, None)
+
+        def build(result):
+            year = event_year(result["event"])
+            return result, build_meeting_rows(result, COUNCIL_ROSTERS[year], matter_indexes)
+
+        def build_failed(result):
+            # Not checkpointed, so --resume redoes it
+            return dict(result, complete=False), []
+
+        def write(built):
+            on_rows(*built)
+
+        stages = run_pipeline(events, [
+            Stage("api", fetch_api, workers=stage_sizes["api"], fallback=fetch_api_failed),
+            Stage("scrape", scrape, workers=stage_sizes["scrape"]),
+            Stage("build", build, workers=stage_sizes["build"], fallback=build_failed),
+            Stage("write", write, workers=1),
+        ], queue_size=stage_sizes["queue"])
+
+        # Let workers exit normally so their browsers shut down cleanly
+        pool.close()
+        pool.join()
+    return sum(stage.dropped for stage in stages)
+
+
+def run_queue_coordinator(jobs, worker_args, on_result, keep_finished=True):
+    """
+    Enqueue every meeting on the shared job queue (job_queue.py) and pass
+    each result to on_result as workers on any node upload it. Returns once
+    every meeting is done. With keep_finished, meetings a previous run of
+    the queue finished (and unchanged since) are not redone.
+    """
+    queued = jobs.enqueue([args[:4] for args in worker_args], keep_finished=keep_finished)
+    waiting = {args[0].get("EventId") for args in worker_args}
+    print(f"  Job queue {jobs.path}: {queued} meetings queued, "
+          f"{len(waiting) - queued} already done; waiting for workers (--role worker)")
+
+    last_counts = None
+    while waiting:
+        done = jobs.finished_ids(waiting)
+        for event_id in done:
+            on_result(jobs.result(event_id))
+        waiting -= done
+        counts = jobs.counts()
+        if counts != last_counts:
+            print("  [Queue] " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+            last_counts = counts
+        if waiting:
+            time.sleep(POLL_SECONDS)
+
+
+def run_queue_worker(jobs, workers, options, controller=None):
+    """
+    Lease meetings from the shared job queue and scrape them in a local pool
+    of worker browsers, uploading each result. A heartbeat thread keeps the
+    leases of meetings in flight alive; an incomplete scrape goes back on
+    the queue until it has been tried MAX_ATTEMPTS times. A meeting that has
+    not come back after MEETING_TIMEOUT seconds stops being heartbeated and
+    is handled the same way. Returns when no meeting is left queued or leased.
+    """
+    owner = worker_name()
+    done = queue.Queue()
+    in_flight = {}
+    stop = threading.Event()
+    processed = 0
+    timed_out = 0
+
+    def heartbeat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            for event_id, job in list(in_flight.items()):
+                if time.monotonic() - job["submitted"] > MEETING_TIMEOUT:
+                    continue
+                if not jobs.heartbeat(event_id, owner):
+                    print(f"  [Queue] Lost the lease on meeting {event_id}; another node will finish it")
+
+    def expired():
+        # In-flight meetings past MEETING_TIMEOUT, removed from in_flight
+        now = time.monotonic()
+        stuck = [job for job in in_flight.values() if now - job["submitted"] > MEETING_TIMEOUT]
+        for job in stuck:
+            del in_flight[job["event_id"]]
+        return stuck
+
+    def submit(job):
+        args = (job["event"], job["items"], job["api_votes"], job["cost"], options)
+        job["submitted"] = time.monotonic()
+        pool.apply_async(process_meeting_worker, (args,),
+                         callback=lambda result: done.put((job, result, None)),
+                         error_callback=lambda error: done.put((job, None, error)))
+
+    print(f"  Job queue worker {owner}: {workers} browsers, queue {jobs.path}")
+    threading.Thread(target=heartbeat, daemon=True).start()
+    with Pool(processes=workers, initializer=init_browser_worker,
+              initargs=(options["headless"], options["recycle_after"], workers)) as pool:
+        try:
+            while True:
+                limit = controller.limit if controller else workers
+                while len(in_flight) < limit:
+                    job = jobs.lease(owner)
+                    if job is None:
+                        break
+                    in_flight[job["event_id"]] = job
+                    submit(job)
+
+                if not in_flight:
+                    if not jobs.unfinished():
+                        break
+                    # Other nodes hold the remaining leases; wait in case one expires
+                    time.sleep(POLL_SECONDS)
+                    continue
+
+                for job in expired():
+                    timed_out += 1
+                    if controller:
+                        controller.record(False)
+                    if job["attempts"] >= MAX_ATTEMPTS:
+                        # Same as a meeting that keeps failing: finish it with API data only
+                        jobs.complete(job["event_id"], owner,
+                                      assemble_result(job["event"], job["items"], job["api_votes"], None))
+                        processed += 1
+                    else:
+                        jobs.release(job["event_id"], owner)
+                    print(f"  [Queue] Meeting {job['event_id']} did not finish in {MEETING_TIMEOUT}s "
+                          f"(attempt {job['attempts']}/{MAX_ATTEMPTS}); lease given up")
+
+                try:
+                    job, result, error = done.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if in_flight.get(job["event_id"]) is not job:
+                    # Came back after it timed out and was released
+                    continue
+                del in_flight[job["event_id"]]
+                if error is not None:
+                    print(f"    Error scraping meeting {job['event_id']}: {error}")
+                    result = assemble_result(job["event"], job["items"], job["api_votes"], None)
+                if controller:
+                    controller.record(bool(result.get("complete")))
+                if result.get("complete") or job["attempts"] >= MAX_ATTEMPTS:
+                    jobs.complete(job["event_id"], owner, result)
+                    processed += 1
+                else:
+                    print(f"  [Queue] Meeting {job['event_id']} incomplete "
+                          f"(attempt {job['attempts']}/{MAX_ATTEMPTS}); requeued")
+                    jobs.release(job["event_id"], owner)
+        finally:
+            stop.set()
+            # Hand back anything still leased so other nodes pick it up at once
+            for event_id in list(in_flight):
+                jobs.release(event_id, owner)
+        if timed_out:
+            # A stuck worker would block join(); the with block terminates the pool
+            return processed
+        # Let workers exit normally so their browsers shut down cleanly
+        pool.close()
+        pool.join()
+    return processed
+
+
+def build_row(event, item, council_members, name_mapping, absent_members=None, item_votes=None, meeting_data=None, matter_indexes=None):
     """Build a CSV row from event, item, and scraped data."""
     absent_members = absent_members or set()
     item_votes = item_votes or {}
@@ -454,7 +919,9 @@ def build_row(event, item, council_members, name_mapping, absent_members=None, i
 
         council_votes.append(vote)
 
-    index_name = extract_index_from_title(item.get("EventItemTitle", ""))
+    # Index/district from the matter record; fall back to guessing from the title
+    index_name = (matter_indexes or {}).get(item.get("EventItemMatterId")) or \
+        extract_index_from_title(item.get("EventItemTitle", ""))
 
     # Document URLs
     agenda_url = meeting_data.get("agenda_url", "") or event.get("EventAgendaFile", "") or ""
@@ -508,102 +975,488 @@ def build_row(event, item, council_members, name_mapping, absent_members=None, i
     return row
 
 
+class StreamingCsvWriter:
+    """
+    Writes each meeting's rows to the output as soon as the meeting finishes.
+
+    Rows go to "<output>.partial" (flushed per meeting, so a crash keeps every
+    finished meeting on disk), prefixed with the meeting's position in the
+    event list. finish() sorts them by date - ties in event order, agenda
+    order kept - and writes (or, with merge, merges) the final CSV.
+    """
+
+    def __init__(self, output_paths, matter_indexes, event_order):
+        self.output_paths = output_paths
+        self.matter_indexes = matter_indexes
+        self.event_order = event_order
+        self.meetings = 0
+        self.rows = {year: 0 for year in output_paths}
+        self._files = {}
+        self._writers = {}
+        for year, path in output_paths.items():
+            f = open(self.partial_path(path), "w", newline="", encoding="utf-8")
+            self._files[year] = f
+            self._writers[year] = csv.writer(f)
+
+    @staticmethod
+    def partial_path(path):
+        return path + ".partial"
+
+    def add(self, result):
+        """Build and flush the rows of one finished meeting."""
+        year = event_year(result["event"])
+        self.write_rows(result, build_meeting_rows(result, COUNCIL_ROSTERS[year], self.matter_indexes))
+
+    def write_rows(self, result, rows):
+        """Flush rows already built for one finished meeting."""
+        year = event_year(result["event"])
+        order = self.event_order.get(result["event"].get("EventId"), 0)
+        with run_metrics.span("csv_write", event_id=result["event"].get("EventId"), rows=len(rows)):
+            self._writers[year].writerows([order] + row for row in rows)
+            self._files[year].flush()
+        self.meetings += 1
+        self.rows[year] += len(rows)
+
+    def finish(self, replaced_urls_by_year=None):
+        """
+        Sort each year's rows into its output CSV and remove the partial file.
+
+        With replaced_urls_by_year (incremental mode), rows are merged into
+        the existing CSV instead, replacing those meetings' old rows.
+        Returns the number of rows written.
+        """
+        total_written = 0
+        for year, path in self.output_paths.items():
+            self._files[year].close()
+            partial = self.partial_path(path)
+            with open(partial, newline="", encoding="utf-8") as f:
+                tagged = list(csv.reader(f))
+            tagged.sort(key=lambda row: (row[1], int(row[0])))  # stable: agenda order kept
+            rows = [row[1:] for row in tagged]
+            headers = BASE_HEADERS + COUNCIL_ROSTERS[year]["members"]
+
+            if replaced_urls_by_year is not None:
+                replaced_urls = replaced_urls_by_year.get(year)
+                if replaced_urls:
+                    total_rows = merge_rows_into_csv(path, headers, rows, replaced_urls)
+                    print(f"\nMerged {len(rows)} updated rows into {path} ({total_rows} total)")
+                    total_written += len(rows)
+            elif rows or len(self.output_paths) == 1:
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(headers)
+                    writer.writerows(rows)
+                print(f"\nWrote {len(rows)} rows to {path}")
+                total_written += len(rows)
+            os.remove(partial)
+        return total_written
+
+
+def merge_rows_into_csv(path, headers, new_rows, replaced_meeting_urls):
+    """
+    Merge freshly built rows into an existing output CSV.
+
+    Rows of re-processed meetings (matched on EventInSiteURL) are replaced,
+    rows of all other meetings are kept, and the result is re-sorted by date.
+    """
+    url_col = headers.index("EventInSiteURL")
+    kept_rows = []
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            existing_headers = next(reader, None)
+            if existing_headers == headers:
+                kept_rows = [row for row in reader if row[url_col] not in replaced_meeting_urls]
+            else:
+                print(f"  Existing {path} has different columns; rewriting it")
+    except FileNotFoundError:
+        pass
+
+    merged = kept_rows + new_rows
+    merged.sort(key=lambda row: row[0])  # stable: keeps agenda order within a meeting
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(merged)
+    return len(merged)
+
+
+# CSV columns before the per-member vote columns
+BASE_HEADERS = [
+    "MeetingDate", "MeetingType", "BodyName", "EventInSiteURL",
+    "EventAgendaFile", "EventMinutesFile", "EventVideoPath",
+    "MatterTypeName", "MatterRequester", "AgendaItemNumber",
+    "AgendaItemTitle", "AgendaItemDescription", "MatterPassedDate",
+    "MatterNotes", "EventItemConsent", "EventItemPassedFlag",
+    "EventItemTally", "IndexName", "ActionName", "ActionText",
+    "EventItemAgendaNote", "EventItemMinutesNote", "Mover", "Seconder",
+    "MatterSponsors", "MatterAttachmentURLs", "EventItemVideo",
+    "ResultsURL", "FileNumber", "FileDetailURL"
+]
+
+
+def event_year(event):
+    """Calendar year of an event (selects the council roster)."""
+    return int((event.get("EventDate") or "0")[:4])
+
+
+def build_meeting_rows(result, roster, matter_indexes):
+    """Build all CSV rows for one processed meeting."""
+    event = result["event"]
+    meeting_data = result["meeting_data"]
+
+    absent_members = set()
+    item_votes = {}
+    if meeting_data:
+        # Convert list back to set
+        absent_members = set(meeting_data.get("absent_members", []))
+        item_votes = meeting_data.get("item_votes", {})
+
+    with run_metrics.span("build_rows", event_id=event.get("EventId"), rows=len(result["items"])):
+        return [
+            build_row(
+                event, item, roster["members"], roster["mapping"],
+                absent_members=absent_members,
+                item_votes=item_votes,
+                meeting_data=meeting_data,
+                matter_indexes=matter_indexes
+            )
+            for item in result["items"]
+        ]
+
+
 def main():
     """Main function with parallel processing."""
     parser = argparse.ArgumentParser(description='Parallel Phoenix City Council meeting data fetcher')
-    parser.add_argument('--year', type=int, required=True, help='Year to fetch (2020 or 2024)')
+    parser.add_argument('--year', type=int, help='Year to fetch (2020-2025)')
     parser.add_argument('--start-month', type=int, default=1, help='Start month (1-12)')
     parser.add_argument('--end-month', type=int, default=4, help='End month (1-12, exclusive)')
-    parser.add_argument('--output', type=str, help='Output CSV file path')
-    parser.add_argument('--workers', type=int, default=3, help='Number of parallel workers (default: 3)')
+    parser.add_argument('--from', dest='from_month', type=str,
+                        help='First month of a multi-year range (YYYY-MM), instead of --year')
+    parser.add_argument('--to', dest='to_month', type=str,
+                        help='Last month of the range, inclusive (YYYY-MM)')
+    parser.add_argument('--output', type=str,
+                        help='Output CSV file path (use {year} when the range spans several years)')
+    parser.add_argument('--workers', type=str, default='3',
+                        help='Number of parallel workers, or "auto" to size from CPU and memory (default: 3)')
     parser.add_argument('--headed', action='store_true', help='Run browser in headed mode')
+    parser.add_argument('--browser-recycle', type=int, default=BROWSER_RECYCLE_AFTER,
+                        help=f'Relaunch each worker browser after this many meetings (default: {BROWSER_RECYCLE_AFTER})')
+    parser.add_argument('--engine', choices=['process', 'async', 'pipeline'], default='process',
+                        help='process: one browser per worker process; async: one browser, many pages; '
+                             'pipeline: staged API/scrape/build/write engine (default: process)')
+    parser.add_argument('--pages', type=int,
+                        help='Concurrent pages for --engine async (default: the --workers auto count, else 8)')
+    parser.add_argument('--api-threads', type=int, default=MAX_WORKERS,
+                        help=f'API stage threads for --engine pipeline (default: {MAX_WORKERS})')
+    parser.add_argument('--build-threads', type=int, default=2,
+                        help='Row-building threads for --engine pipeline (default: 2)')
+    parser.add_argument('--queue-size', type=int,
+                        help='Bounded queue size between pipeline stages (default: 2 x --workers)')
+    parser.add_argument('--http-votes', action='store_true',
+                        help='Fetch Action Details (HistoryDetail) pages over HTTP instead of clicking popups')
+    parser.add_argument('--allow-resources', type=str, default=DEFAULT_ALLOW,
+                        help='Comma separated resource types / URL substrings not to block ("all" disables blocking)')
+    parser.add_argument('--archive-html', action='store_true',
+                        help='Save raw meeting and Action Details pages to the compressed HTML archive')
+    parser.add_argument('--from-archive', action='store_true',
+                        help='Rebuild scraped data from the HTML archive instead of launching a browser')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip meetings finished by an earlier (interrupted) run and unchanged since')
+    parser.add_argument('--job-queue', type=str,
+                        help='Shared job queue file (SQLite on a volume every node can reach) to spread meetings over machines')
+    parser.add_argument('--role', choices=['coordinator', 'worker'], default='coordinator',
+                        help='With --job-queue: coordinator discovers meetings, merges results and writes the CSV; '
+                             'worker leases meetings and scrapes them (default: coordinator)')
+    parser.add_argument('--trace', type=str,
+                        help='Write every timing span (stage, start, duration, meeting) to this JSONL file')
+    parser.add_argument('--metrics', type=str,
+                        help='Write a Prometheus textfile with per-stage p50/p95/p99, retries and bytes')
+    parser.add_argument('--api-concurrency', type=int, default=0,
+                        help='Run bulk API lookups on the asyncio client (httpx) with this many requests in flight')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk API response cache')
+    parser.add_argument('--since-last-run', action='store_true',
+                        help='Only process meetings changed since the last run and merge them into --output')
     args = parser.parse_args()
 
-    # Validate year
-    if args.year not in COUNCIL_ROSTERS:
-        print(f"Error: Year {args.year} not supported. Use 2020 or 2024.")
+    if args.no_cache:
+        set_cache_enabled(False)
+    if args.api_concurrency:
+        try:
+            set_async_concurrency(args.api_concurrency)
+        except RuntimeError as e:
+            parser.error(str(e))
+    auto_workers = args.workers == "auto"
+    if auto_workers:
+        args.workers = auto_worker_count()
+    elif args.workers.isdigit() and int(args.workers) > 0:
+        args.workers = int(args.workers)
+    else:
+        parser.error(f"--workers must be a positive number or 'auto', not {args.workers!r}")
+    if args.pages is None:
+        args.pages = args.workers if auto_workers else DEFAULT_PAGES
+    if args.from_archive and args.archive_html:
+        parser.error("--from-archive reads the archive; it cannot be combined with --archive-html")
+    if args.job_queue and (args.from_archive or args.engine != "process"):
+        parser.error("--job-queue runs the process engine; it cannot be combined with --from-archive or --engine")
+
+    # Worker node: scrape whatever the coordinator queued, then exit
+    if args.job_queue and args.role == "worker":
+        scrape_options = {
+            "headless": not args.headed,
+            "http_votes": args.http_votes,
+            "allow_resources": parse_allowlist(args.allow_resources),
+            "archive": args.archive_html,
+            "recycle_after": args.browser_recycle
+        }
+        controller = ConcurrencyController(args.workers) if auto_workers else None
+        start_time = time.time()
+        processed = run_queue_worker(JobQueue(args.job_queue), args.workers, scrape_options, controller)
+        print(f"\nQueue drained: {processed} meetings scraped on this node "
+              f"in {time.time() - start_time:.1f} seconds")
+        return
+    if args.role == "worker":
+        parser.error("--role worker requires --job-queue")
+
+    # Work out the period: a single --year window or a --from/--to month range
+    if args.from_month or args.to_month:
+        if not (args.from_month and args.to_month) or args.year:
+            parser.error("--from and --to must be given together, without --year")
+        for value in (args.from_month, args.to_month):
+            if not re.match(r'^\d{4}-(0[1-9]|1[0-2])$', value):
+                parser.error(f"Invalid month {value!r}; expected YYYY-MM")
+        if args.from_month > args.to_month:
+            parser.error("--from must not be after --to")
+        start_date = month_shards(args.from_month, args.from_month)[0][0]
+        end_date = month_shards(args.to_month, args.to_month)[0][1]
+        years = list(range(int(args.from_month[:4]), int(args.to_month[:4]) + 1))
+    elif args.year:
+        start_date = f"{args.year}-{args.start_month:02d}-01"
+        end_date = f"{args.year}-{args.end_month:02d}-01"
+        years = [args.year]
+    else:
+        parser.error("either --year or --from/--to is required")
+
+    # Validate years
+    unsupported = [year for year in years if year not in COUNCIL_ROSTERS]
+    if unsupported:
+        supported = ", ".join(str(year) for year in sorted(COUNCIL_ROSTERS))
+        print(f"Warning: no council roster for {', '.join(map(str, unsupported))}; "
+              f"those meetings will be skipped (supported: {supported})")
+    years = [year for year in years if year in COUNCIL_ROSTERS]
+    if not years:
+        print("Error: no supported years in the requested period.")
         return
 
-    roster = COUNCIL_ROSTERS[args.year]
-    council_members = roster["members"]
-    name_mapping = roster["mapping"]
-
-    # Default output filename
-    if not args.output:
+    # Output file per roster year
+    if args.output:
+        if len(years) > 1 and "{year}" not in args.output:
+            parser.error("--output must contain {year} when the period spans several years")
+        output_paths = {year: args.output.replace("{year}", str(year)) for year in years}
+    elif args.year:
         quarter = (args.start_month - 1) // 3 + 1
-        args.output = f"phoenix_council_{args.year}_Q{quarter}_parallel.csv"
-
-    # CSV headers
-    headers = [
-        "MeetingDate", "MeetingType", "BodyName", "EventInSiteURL",
-        "EventAgendaFile", "EventMinutesFile", "EventVideoPath",
-        "MatterTypeName", "MatterRequester", "AgendaItemNumber",
-        "AgendaItemTitle", "AgendaItemDescription", "MatterPassedDate",
-        "MatterNotes", "EventItemConsent", "EventItemPassedFlag",
-        "EventItemTally", "IndexName", "ActionName", "ActionText",
-        "EventItemAgendaNote", "EventItemMinutesNote", "Mover", "Seconder",
-        "MatterSponsors", "MatterAttachmentURLs", "EventItemVideo",
-        "ResultsURL", "FileNumber", "FileDetailURL"
-    ] + council_members
-
-    # Get events
-    events = get_events(args.year, start_month=args.start_month, end_month=args.end_month)
+        output_paths = {args.year: f"phoenix_council_{args.year}_Q{quarter}_parallel.csv"}
+    else:
+        output_paths = {year: f"phoenix_council_{year}_parallel.csv" for year in years}
+
+    # Get events (only changed ones in incremental mode). The watermark is
+    # kept per window and output files: changes outside this window, or not
+    # yet written to these files, must not be skipped by a later run.
+    run_start = time.time()
+    sync_scope = f"{start_date}..{end_date}:" + ",".join(sorted(output_paths.values()))
+    since = load_watermark(FORMAL_BODY_ID, sync_scope) if args.since_last_run else ""
+    missing_outputs = [path for path in output_paths.values() if not os.path.exists(path)]
+    if since and missing_outputs:
+        print(f"  {', '.join(missing_outputs)} not found; running a full extraction instead of an incremental one")
+        since = ""
+    with run_metrics.span("get_events"):
+        if since:
+            events, newest = get_changed_events(start_date, end_date, since)
+            if events is None:
+                print("Error: could not query changes; watermark left unchanged")
+                return
+        elif args.from_month:
+            events = get_events_sharded(FORMAL_BODY_ID, args.from_month, args.to_month)
+            if events is None:
+                return
+        else:
+            events = get_events(args.year, start_month=args.start_month, end_month=args.end_month)
+
+    events = [event for event in events if event_year(event) in output_paths]
     if not events:
-        print("No events found!")
+        if since:
+            save_watermark(FORMAL_BODY_ID, newest, sync_scope)
+            print("No meetings changed since last run.")
+        else:
+            print("No events found!")
         return
 
-    print(f"\nStarting parallel extraction with {args.workers} workers...")
+    if args.job_queue:
+        print(f"\nStarting distributed extraction through job queue {args.job_queue}...")
+    elif args.from_archive:
+        print("\nStarting offline extraction from the HTML archive...")
+    elif args.engine == "async":
+        print(f"\nStarting async extraction with {args.pages} concurrent pages...")
+    elif args.engine == "pipeline":
+        print(f"\nStarting pipeline extraction ({args.api_threads} API threads, {args.workers} browsers, "
+              f"{args.build_threads} build threads)...")
+    else:
+        print(f"\nStarting parallel extraction with {args.workers} workers...")
     start_time = time.time()
+    use_pipeline = args.engine == "pipeline" and not args.from_archive
+
+    # Meetings checkpointed by an earlier run (and unchanged since) are not redone
+    checkpoints = get_checkpoint_store()
+    resumed = checkpoints.get_many(CHECKPOINT_NAME, events) if args.resume else {}
+    pending = [event for event in events if event.get("EventId") not in resumed]
+    if args.resume:
+        print(f"  Resuming: {len(resumed)} meetings already done, {len(pending)} to process")
+
+    # Fetch agenda items for all meetings at once before handing out browser work
+    # (the pipeline engine fetches them per meeting in its API stage instead)
+    fetch_up_front = bool(pending) and not use_pipeline
+    with run_metrics.span("get_event_items", meetings=len(pending) if fetch_up_front else 0):
+        items_by_event = get_event_items_many(pending, refresh=bool(since)) if fetch_up_front else {}
+    # (None for meetings whose items could not be fetched; those come out incomplete)
+    pending_items = [item for items in items_by_event.values() for item in items or []]
+    for event_id, result in resumed.items():
+        items_by_event[event_id] = result["items"]
+
+    # Individual votes from the API for every item at once; the browser only
+    # has to open Action Details popups for items the API has nothing for
+    all_items = [item for items in items_by_event.values() for item in items or []]
+    with run_metrics.span("get_votes", items=len(pending_items)):
+        votes_by_item = get_votes_many(pending_items)
+    if fetch_up_front:
+        print(f"  API votes found for {len(votes_by_item)} of {len(pending_items)} agenda items")
+    with run_metrics.span("get_matter_indexes"):
+        matter_indexes = get_matter_index_names(item.get("EventItemMatterId") for item in all_items)
+    api_votes_by_event = {}
+    for event in pending if fetch_up_front else ():
+        event_id = event.get("EventId")
+        name_mapping = COUNCIL_ROSTERS[event_year(event)]["mapping"]
+        api_item_votes, api_absent = get_api_item_votes(items_by_event.get(event_id) or [], list(name_mapping), votes_by_item)
+        api_votes_by_event[event_id] = (api_item_votes, sorted(api_absent))
 
     # Prepare arguments for each worker
     headless = not args.headed
-    worker_args = [(event, i % args.workers, headless) for i, event in enumerate(events)]
-
-    # Process meetings in parallel
-    all_results = []
-    with Pool(processes=args.workers) as pool:
-        results = pool.map(process_meeting_worker, worker_args)
-        all_results = [r for r in results if r is not None]
-
-    # Sort results by date to maintain order
-    all_results.sort(key=lambda x: x["event_date"])
-
-    # Build all rows
-    all_rows = []
-    for result in all_results:
-        event = result["event"]
-        items = result["items"]
-        meeting_data = result["meeting_data"]
-
-        absent_members = set()
-        item_votes = {}
-        if meeting_data:
-            # Convert list back to set
-            absent_members = set(meeting_data.get("absent_members", []))
-            item_votes = meeting_data.get("item_votes", {})
-
-        for item in items:
-            row = build_row(
-                event, item, council_members, name_mapping,
-                absent_members=absent_members,
-                item_votes=item_votes,
-                meeting_data=meeting_data
-            )
-            all_rows.append(row)
-
-    # Write CSV
-    with open(args.output, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        writer.writerows(all_rows)
+    scrape_options = {
+        "headless": headless,
+        "http_votes": args.http_votes,
+        "allow_resources": parse_allowlist(args.allow_resources),
+        "archive": args.archive_html,
+        "recycle_after": args.browser_recycle
+    }
+    worker_args = []
+    for event in pending if fetch_up_front else ():
+        items = items_by_event.get(event.get("EventId"))
+        api_votes = api_votes_by_event.get(event.get("EventId"), ({}, []))
+        cost = estimate_meeting_cost(event, items, api_votes, http_votes=args.http_votes)
+        worker_args.append((event, items, api_votes, cost, scrape_options))
+
+    # Most expensive meetings first; each worker pulls the next one when free
+    concurrency = args.pages if args.engine == "async" else args.workers
+    worker_args = schedule_meetings(worker_args, concurrency)
+
+    # Rows are built and flushed to disk as each meeting finishes
+    event_order = {event.get("EventId"): i for i, event in enumerate(events)}
+    writer = StreamingCsvWriter(output_paths, matter_indexes, event_order)
+    for event in events:
+        if event.get("EventId") in resumed:
+            writer.add(resumed[event.get("EventId")])
+
+    # Newest item timestamp seen and meetings left incomplete, for the sync watermark
+    sync = {"newest_item": "", "failed": 0}
+    for items in items_by_event.values():
+        sync["newest_item"] = newest_modified(items or [], "EventItemLastModifiedUtc", sync["newest_item"])
+
+    def finished_rows(result, rows):
+        # Spans and counters recorded in the worker that scraped the meeting
+        run_metrics.merge(result.pop("metrics", None))
+        # Checkpoint first: the meeting is safe even if writing its rows fails
+        if result.get("complete"):
+            checkpoints.put(CHECKPOINT_NAME, result["event"], result)
+        else:
+            sync["failed"] += 1
+        sync["newest_item"] = newest_modified(result["items"], "EventItemLastModifiedUtc", sync["newest_item"])
+        writer.write_rows(result, rows)
+
+    def finished(result):
+        year = event_year(result["event"])
+        finished_rows(result, build_meeting_rows(result, COUNCIL_ROSTERS[year], matter_indexes))
+
+    if not pending:
+        print("  Every meeting was already done; nothing to scrape")
+    elif use_pipeline:
+        # Staged engine: API, scrape, build and write stages on bounded queues
+        stage_sizes = {
+            "api": args.api_threads,
+            "scrape": args.workers,
+            "build": args.build_threads,
+            "queue": args.queue_size or 2 * args.workers
+        }
+        sync["failed"] += run_pipeline_engine(pending, scrape_options, stage_sizes, matter_indexes, bool(since),
+                                             finished_rows)
+    elif args.job_queue:
+        # Worker nodes scrape; results are merged here exactly as if scraped locally
+        run_queue_coordinator(JobQueue(args.job_queue), worker_args, finished, keep_finished=not since)
+    elif args.from_archive:
+        # Re-parse archived pages; no browser
+        run_archive_engine(worker_args, finished)
+    elif args.engine == "async":
+        # One browser, many concurrent pages in a single event loop
+        run_async_engine(worker_args, args.pages, scrape_options, finished)
+    else:
+        # Process meetings in parallel (one long-lived browser per worker process)
+        # (--workers auto: meetings in flight adapt to throughput and failures)
+        controller = ConcurrencyController(args.workers) if auto_workers else None
+        run_process_engine(worker_args, args.workers, headless, args.browser_recycle, finished, controller)
+
+    # Sort by date and write (or merge) one CSV per year
+    replaced_urls_by_year = None
+    if since:
+        replaced_urls_by_year = {}
+        for event in events:
+            replaced_urls_by_year.setdefault(event_year(event), set()).add(event.get("EventInSiteURL", ""))
+    with run_metrics.span("csv_finish"):
+        total_written = writer.finish(replaced_urls_by_year)
+
+    # Advance the watermark only after the output is safely written
+    if args.since_last_run and sync["failed"]:
+        # Incomplete meetings got API-only rows; the next run redoes them
+        print(f"Sync watermark for body {FORMAL_BODY_ID} not advanced: "
+              f"{sync['failed']} meetings incomplete or dropped")
+    elif args.since_last_run:
+        if not since:
+            newest = max(newest_modified(events, "EventLastModifiedUtc"), sync["newest_item"])
+        save_watermark(FORMAL_BODY_ID, newest, sync_scope)
+        print(f"Sync watermark for body {FORMAL_BODY_ID} ({sync_scope}): {newest}")
 
     elapsed = time.time() - start_time
-    print(f"\nComplete! Wrote {len(all_rows)} rows to {args.output}")
+    print(f"\nComplete! {total_written} rows from {writer.meetings} meetings")
     print(f"Time elapsed: {elapsed:.1f} seconds ({elapsed/60:.1f} minutes)")
-    print(f"Workers used: {args.workers}")
+    if args.job_queue:
+        print(f"Scraped by worker nodes through {args.job_queue}")
+    elif args.from_archive:
+        print("Scraped data rebuilt from the HTML archive")
+    elif args.engine == "async":
+        print(f"Concurrent pages used: {args.pages}")
+    else:
+        print(f"Workers used: {args.workers}")
     if len(events) > 0:
         print(f"Average per meeting: {elapsed/len(events):.1f} seconds")
 
+    # Where the time went, per stage
+    print("\nStage timings:")
+    for line in run_metrics.summary():
+        print(f"  {line}")
+    if args.trace:
+        spans = run_metrics.write_trace(args.trace)
+        print(f"Trace: {spans} spans written to {args.trace}")
+    if args.metrics:
+        run_metrics.write_prometheus(args.metrics, elapsed=time.time() - run_start)
+        print(f"Metrics written to {args.metrics}")
+
 
 if __name__ == "__main__":
     main()
@@ -17,9 +17,10 @@ import xml.etree.ElementTree as ET
 import csv
 import re
 import argparse
-import time
 from datetime import datetime
 
+import page_waits
+
 # City of Phoenix YouTube channel
 CHANNEL_ID = "x7FQNzOFCbtExt_gRub9JQ"  # Found from RSS feed
 
@@ -128,8 +129,8 @@ def scrape_phoenix_gov_videos(meeting_dates, headless=True):
             print(f"\n  Checking page {page_num + 1} (offset {offset})...")
 
             try:
-                page.goto(url, wait_until="networkidle", timeout=30000)
-                time.sleep(1.5)
+                # The meetings table is rendered client-side; wait for its rows
+                page_waits.goto(page, url, ready_selector='.cmp-dynamic-table__data-row')
 
                 # Get all "See More" buttons and their associated date/type text
                 # Each meeting entry has a container with date, type, and See More button
@@ -155,7 +156,7 @@ def scrape_phoenix_gov_videos(meeting_dates, headless=True):
                             see_more = container.query_selector('button:has-text("See More")')
                             if see_more:
                                 see_more.click()
-                                time.sleep(1)
+                                page_waits.wait_for(page, 'tr:has-text("Video:")')
 
                                 # The expanded content appears right after this container
                                 # Look for a table with Video row within the page
@@ -179,7 +180,7 @@ def scrape_phoenix_gov_videos(meeting_dates, headless=True):
                                 see_less = page.query_selector('button:has-text("See Less")')
                                 if see_less:
                                     see_less.click()
-                                    time.sleep(0.5)
+                                    page_waits.wait_for(page, 'button:has-text("See Less")', state="hidden")
 
                             break  # Move to next container after processing this date
 
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Compressed, content-addressed archive of the raw HTML the scrapers saw.
+
+Layout (under ARCHIVE_DIR, default .legistar_cache/html_archive, override
+with LEGISTAR_ARCHIVE_DIR):
+- objects/ab/cdef... : zlib-compressed page bodies named by their SHA-256,
+  so a page that did not change between runs is stored once
+- index.sqlite       : one row per capture (url, kind, fetched_at, sha256, meta)
+
+Kinds: "meeting" (rendered MeetingDetail page), "action" (Action Details /
+HistoryDetail page), "detail" (LegislationDetail item page).
+
+rebuild_meeting_data() re-creates a scraper's meeting_data (document URLs,
+item detail URLs, item_votes, absent_members) from the newest captures
+without a browser, so parser fixes can be replayed over archived meetings.
+
+Usage:
+    archive = get_archive()
+    archive.put(meeting_url, page.content(), "meeting")
+    meeting_data = rebuild_meeting_data(meeting_url)
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+
+from legistar_cache import CACHE_DIR, SQLiteStore
+
+ARCHIVE_DIR = os.environ.get("LEGISTAR_ARCHIVE_DIR", os.path.join(CACHE_DIR, "html_archive"))
+
+
+class HtmlArchive(SQLiteStore):
+    """Content-addressed page store with a SQLite capture index."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        super().__init__(os.path.join(root, "index.sqlite"))
+        self.objects_dir = os.path.join(root, "objects")
+
+    def _init_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS captures (
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                sha256 TEXT NOT NULL,
+                meta TEXT NOT NULL,
+                PRIMARY KEY (url, fetched_at)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_captures_kind ON captures(kind, url)")
+
+    def _object_path(self, sha):
+        return os.path.join(self.objects_dir, sha[:2], sha[2:])
+
+    def put(self, url, html, kind, meta=None):
+        """Archive one capture of url; returns the content hash."""
+        body = html.encode("utf-8")
+        sha = hashlib.sha256(body).hexdigest()
+        path = self._object_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(body))
+            os.replace(tmp_path, path)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO captures VALUES (?, ?, ?, ?, ?)",
+                (url, kind, time.time(), sha, json.dumps(meta or {}))
+            )
+            conn.commit()
+        return sha
+
+    def read(self, sha):
+        """Return the archived body with this hash."""
+        with open(self._object_path(sha), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def latest(self, url):
+        """Newest archived HTML for url, or None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT sha256 FROM captures WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (url,)
+            ).fetchone()
+        return self.read(row[0]) if row else None
+
+    def history(self, url):
+        """All captures of url as [(fetched_at, sha256, meta)], oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT fetched_at, sha256, meta FROM captures WHERE url = ? ORDER BY fetched_at",
+                (url,)
+            ).fetchall()
+        return [(fetched_at, sha, json.loads(meta)) for fetched_at, sha, meta in rows]
+
+    def urls(self, kind):
+        """Every archived URL of a kind."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT DISTINCT url FROM captures WHERE kind = ?", (kind,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+_archive = None
+
+
+def get_archive():
+    """Return this process's archive (opened lazily)."""
+    global _archive
+    if _archive is None:
+        _archive = HtmlArchive()
+    return _archive
+
+
+def rebuild_meeting_data(meeting_url, archive=None):
+    """
+    Rebuild a scraper's meeting_data for meeting_url from archived HTML.
+
+    Returns None if the meeting page was never archived. Votes come from the
+    archived Action Details pages linked from the archived meeting page;
+    items whose page was never captured, or whose page belongs to another
+    item (action_details.parse_history_detail_for), have no scraped votes.
+    """
+    from meeting_page import snapshot_from_html, parse_meeting_snapshot
+    from action_details import action_detail_targets, parse_history_detail_for
+
+    archive = archive or get_archive()
+    html = archive.latest(meeting_url)
+    if html is None:
+        return None
+
+    meeting = parse_meeting_snapshot(snapshot_from_html(html))
+    item_votes = {}
+    absent_members = set()
+    for file_number, url in action_detail_targets(meeting["actions"]).items():
+        page = archive.latest(url)
+        votes = parse_history_detail_for(page, file_number) if page else None
+        if votes:
+            item_votes[file_number] = votes
+            for member, vote in votes.items():
+                if vote.lower() == "absent":
+                    absent_members.add(member)
+
+    return {
+        "agenda_url": meeting["agenda_url"],
+        "minutes_url": meeting["minutes_url"],
+        "results_url": meeting["results_url"],
+        "item_votes": item_votes,
+        "item_detail_urls": meeting["item_detail_urls"],
+        "absent_members": absent_members
+    }
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Item summary stage: the "Report Summary" text of LegislationDetail pages.
+
+Runs once over every item detail URL collected from the meeting pages,
+instead of navigating the meeting page's own tab to each detail page and
+back. Two ways to read the pages:
+- "http" (default): fetched concurrently over the pooled session and parsed
+  with lxml if installed, else html.parser
+- "browser": a separate async Playwright browser with a pool of pages, for
+  when the summary is only rendered client-side
+
+Summaries are cached by file number (legistar_cache.ItemSummaryStore), so
+re-runs only visit items they have not seen. Empty summaries are not cached:
+a page that rendered nothing is read again next run (e.g. with
+--summary-mode browser). Pages read can also be saved to
+the raw HTML archive (html_archive.py).
+
+Usage:
+    summaries = get_item_summaries(item_detail_urls)   # {file_number: summary}
+"""
+
+import asyncio
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+
+import page_waits
+from legistar_api import MAX_WORKERS, fetch_text, get_item_summary_store
+from resource_filter import ResourceFilter
+
+DEFAULT_PAGES = 4
+
+# Longest summary kept (characters)
+MAX_SUMMARY_LENGTH = 2000
+
+SECTION_LABELS = ["Title", "Report", "Summary", "Department", "Responsible Department"]
+
+# Visible once the "Item Summary" tab's panel is showing (hidden tab panels never match)
+SUMMARY_PANEL_SELECTOR = "p:has-text('Summary')"
+
+PARAGRAPHS_JS = "() => Array.from(document.querySelectorAll('p')).map(p => (p.textContent || '').trim())"
+
+
+def extract_summary(paragraphs):
+    """
+    Pick the item summary out of a detail page's paragraph texts.
+
+    Takes up to five substantial paragraphs after a "Report Summary" heading
+    (which may be split over two paragraphs); if there is none, falls back to
+    the first three long paragraphs that are not section labels.
+    """
+    summary_parts = []
+    capture = False
+    found_report_summary = False
+
+    for text in paragraphs:
+        # Look for "Report" followed by "Summary" pattern (split across paragraphs)
+        if text == "Report":
+            found_report_summary = True
+            continue
+        if found_report_summary and text == "Summary":
+            capture = True
+            continue
+
+        # Also check for "Report Summary" in single text
+        if "Report Summary" in text:
+            capture = True
+            continue
+
+        # Capture meaningful content (skip short labels like "Department")
+        if capture and text and len(text) > 20:
+            if text in ["Department", "Responsible Department", "Title"]:
+                continue
+            summary_parts.append(text)
+            if len(summary_parts) >= 5:
+                break
+
+    summary = " ".join(summary_parts)
+
+    if not summary:
+        all_text = [text for text in paragraphs if text and len(text) > 30 and text not in SECTION_LABELS]
+        summary = " ".join(all_text[:3])
+
+    return summary[:MAX_SUMMARY_LENGTH]
+
+
+class _ParagraphParser(HTMLParser):
+    """Collects the stripped text of every <p> element."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "p":
+            if self._depth == 0:
+                self.paragraphs.append("")
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "p" and self._depth:
+            self._depth -= 1
+            if self._depth == 0:
+                self.paragraphs[-1] = self.paragraphs[-1].strip()
+
+    def handle_data(self, data):
+        if self._depth:
+            self.paragraphs[-1] += data
+
+
+def paragraphs_from_html(html):
+    """Text of every <p> on a page, in document order."""
+    try:
+        import lxml.html
+    except ImportError:
+        parser = _ParagraphParser()
+        parser.feed(html)
+        parser.close()
+        return parser.paragraphs
+    doc = lxml.html.fromstring(html)
+    return [p.text_content().strip() for p in doc.iter("p")]
+
+
+def fetch_summaries_http(urls_by_file, max_workers=MAX_WORKERS, archive=None):
+    """Fetch and parse detail pages concurrently; failed downloads are left out."""
+    file_numbers = list(urls_by_file)
+    if not file_numbers:
+        return {}
+
+    def fetch_one(file_number):
+        html = fetch_text(urls_by_file[file_number], verbose=False)
+        if html is None:
+            return None
+        if archive:
+            archive.put(urls_by_file[file_number], html, "detail", {"file_number": file_number})
+        return extract_summary(paragraphs_from_html(html))
+
+    workers = max(1, min(max_workers, len(file_numbers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        summaries = list(executor.map(fetch_one, file_numbers))
+    return {
+        file_number: summary
+        for file_number, summary in zip(file_numbers, summaries)
+        if summary is not None
+    }
+
+
+async def _scrape_summaries_browser(urls_by_file, pages, headless, allow_resources, archive):
+    from playwright.async_api import async_playwright
+
+    queue = asyncio.Queue()
+    for file_number, url in urls_by_file.items():
+        queue.put_nowait((file_number, url))
+    summaries = {}
+
+    async def worker(page):
+        while not queue.empty():
+            file_number, url = queue.get_nowait()
+            try:
+                await page_waits.goto_async(page, url, ready_selector="p")
+                summary_tab = await page.query_selector("a:has-text('Item Summary')")
+                if summary_tab:
+                    await summary_tab.click()
+                    await page_waits.wait_for_async(page, SUMMARY_PANEL_SELECTOR, state="visible")
+                summaries[file_number] = extract_summary(await page.evaluate(PARAGRAPHS_JS))
+                if archive:
+                    archive.put(url, await page.content(), "detail", {"file_number": file_number})
+            except Exception as e:
+                print(f"        -> Summary for {file_number} failed: {e}")
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless)
+        try:
+            context = await browser.new_context()
+            await ResourceFilter(allow_resources).install_async(context)
+            workers = [worker(await context.new_page()) for _ in range(min(pages, len(urls_by_file)))]
+            await asyncio.gather(*workers)
+        finally:
+            await browser.close()
+    return summaries
+
+
+def scrape_summaries_browser(urls_by_file, pages=DEFAULT_PAGES, headless=True, allow_resources=None,
+                             archive=None):
+    """Read detail pages with a pool of browser pages; failed pages are left out."""
+    if not urls_by_file:
+        return {}
+    return asyncio.run(_scrape_summaries_browser(urls_by_file, pages, headless, allow_resources, archive))
+
+
+def get_item_summaries(urls_by_file, mode="http", pages=DEFAULT_PAGES, headless=True, allow_resources=None,
+                       archive=None):
+    """
+    Return {file_number: summary} for every item detail URL.
+
+    Cached summaries are served from disk; the rest are read with `mode`
+    ("http" or "browser") and the non-empty ones stored for later runs. Pages read are saved to
+    archive (an html_archive.HtmlArchive) if one is given.
+    """
+    store = get_item_summary_store()
+    summaries = store.get_many(urls_by_file) if store else {}
+    missing = {file_number: url for file_number, url in urls_by_file.items() if file_number not in summaries}
+    print(f"Item summaries: {len(summaries)} cached, fetching {len(missing)} ({mode})")
+
+    if mode == "browser":
+        fetched = scrape_summaries_browser(missing, pages=pages, headless=headless, allow_resources=allow_resources,
+                                           archive=archive)
+    else:
+        fetched = fetch_summaries_http(missing, archive=archive)
+
+    if store:
+        store.put_many({file_number: summary for file_number, summary in fetched.items() if summary})
+    summaries.update(fetched)
+    found = sum(1 for summary in fetched.values() if summary)
+    print(f"  Found {found} new summaries, {len(urls_by_file) - len(summaries)} pages failed")
+    return summaries
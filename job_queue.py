@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Shared meeting job queue for multi-node extraction.
+
+A SQLite file on a volume every node can reach (NFS, SMB, a mounted bucket
+with POSIX locks) holds one job per meeting. The coordinator
+(fetch_data_parallel.py --job-queue PATH) does the API work, enqueues each
+meeting's EventId with its items and API votes, and merges results into the
+CSV as they arrive. Workers on any node (--job-queue PATH --role worker)
+lease jobs, scrape them in their own browser pool and upload the results.
+
+Leases:
+- a lease lasts LEASE_SECONDS and is extended by a heartbeat thread while
+  the meeting is being scraped
+- a lease that expires (dead node, lost volume) makes the job leasable
+  again, so another node redoes it
+- a job that fails MAX_ATTEMPTS times is finished with whatever result the
+  last attempt had (API data only), exactly like a failed scrape on one node
+
+Jobs are leased most expensive first (cost estimated by the coordinator).
+Results are stored as JSON and merged by the same writer as a single-node
+run, so the CSV is identical.
+
+Usage:
+    jobs = JobQueue(path)
+    jobs.enqueue([(event, items, api_votes, cost), ...])
+    job = jobs.lease(owner)          # worker
+    jobs.heartbeat(job["event_id"], owner)
+    jobs.complete(job["event_id"], owner, result)
+"""
+
+import os
+import json
+import time
+import zlib
+import socket
+
+from legistar_cache import SQLiteStore
+
+LEASE_SECONDS = 300
+HEARTBEAT_SECONDS = LEASE_SECONDS / 3
+MAX_ATTEMPTS = 3
+
+# Seconds between polls when there is nothing to lease / nothing finished yet
+POLL_SECONDS = 5
+
+
+def worker_name():
+    """Lease owner id for this process: host:pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class JobQueue(SQLiteStore):
+    """Meeting jobs with leases, heartbeats and expiry."""
+
+    # Rollback journal: WAL does not work across machines on a shared volume
+    journal_mode = "DELETE"
+
+    def _init_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                event_id INTEGER PRIMARY KEY,
+                last_modified TEXT NOT NULL,
+                cost REAL NOT NULL,
+                payload BLOB NOT NULL,
+                status TEXT NOT NULL,
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result BLOB,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, cost)")
+
+    def enqueue(self, jobs, keep_finished=True):
+        """
+        Add (event, items, api_votes, cost) jobs.
+
+        With keep_finished, a meeting already finished at the same
+        EventLastModifiedUtc keeps its result (a restarted coordinator does
+        not redo it); anything else is (re)queued. Returns the number of
+        jobs queued.
+        """
+        now = time.time()
+        queued = 0
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            for event, items, api_votes, cost in jobs:
+                event_id = event.get("EventId")
+                last_modified = event.get("EventLastModifiedUtc") or ""
+                row = conn.execute(
+                    "SELECT status, last_modified FROM jobs WHERE event_id = ?", (event_id,)
+                ).fetchone()
+                if keep_finished and row and row[0] == "done" and row[1] == last_modified:
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs "
+                    "(event_id, last_modified, cost, payload, status, attempts, updated_at) "
+                    "VALUES (?, ?, ?, ?, 'queued', 0, ?)",
+                    (event_id, last_modified, cost, _pack([event, items, api_votes]), now)
+                )
+                queued += 1
+            conn.commit()
+        return queued
+
+    def lease(self, owner, lease_seconds=LEASE_SECONDS):
+        """
+        Lease the most expensive available job (queued, or leased with an
+        expired lease). Returns {event_id, event, items, api_votes, cost,
+        attempts} or None.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT event_id, cost, payload, attempts FROM jobs "
+                "WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY cost DESC LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            event_id, cost, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE event_id = ?",
+                (owner, now + lease_seconds, now, event_id)
+            )
+            conn.commit()
+        event, items, api_votes = _unpack(payload)
+        return {
+            "event_id": event_id,
+            "event": event,
+            "items": items,
+            "api_votes": api_votes,
+            "cost": cost,
+            "attempts": attempts + 1,
+        }
+
+    def heartbeat(self, event_id, owner, lease_seconds=LEASE_SECONDS):
+        """Extend a lease; returns False if the job is no longer ours."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE event_id = ? AND owner = ? AND status = 'leased'",
+                (now + lease_seconds, now, event_id, owner)
+            )
+            conn.commit()
+        return cursor.rowcount == 1
+
+    def complete(self, event_id, owner, result):
+        """Store a job's result. The first result uploaded wins."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET status = 'done', owner = ?, result = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE event_id = ? AND status != 'done'",
+                (owner, _pack(result), time.time(), event_id)
+            )
+            conn.commit()
+
+    def release(self, event_id, owner):
+        """Give a leased job back to the queue (to be retried, possibly elsewhere)."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE event_id = ? AND owner = ? AND status = 'leased'",
+                (time.time(), event_id, owner)
+            )
+            conn.commit()
+
+    def counts(self):
+        """Return {status: number of jobs}, counting expired leases as "queued"."""
+        now = time.time()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT CASE WHEN status = 'leased' AND lease_expires < ? THEN 'queued' ELSE status END, "
+                "COUNT(*) FROM jobs GROUP BY 1",
+                (now,)
+            ).fetchall()
+        return dict(rows)
+
+    def unfinished(self):
+        """Number of jobs not done yet."""
+        counts = self.counts()
+        return sum(count for status, count in counts.items() if status != "done")
+
+    def finished_ids(self, event_ids):
+        """The given EventIds whose jobs are done."""
+        event_ids = list(event_ids)
+        done = set()
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(event_ids), 500):
+                chunk = event_ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT event_id FROM jobs WHERE status = 'done' AND event_id IN ({placeholders})",
+                    chunk
+                )
+                done.update(row[0] for row in rows)
+        return done
+
+    def result(self, event_id):
+        """The uploaded result of a finished job."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT result FROM jobs WHERE event_id = ? AND status = 'done'", (event_id,)
+            ).fetchone()
+        return _unpack(row[0]) if row else None
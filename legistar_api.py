@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+"""
+Shared Legistar API client for the Phoenix City Council fetchers.
+
+Features:
+- One pooled keep-alive session per process (no TLS handshake per call)
+- Bounded thread pool for fetching many URLs at once
+- Concurrent agenda item lookup for a whole set of events
+- Responses cached on disk (see legistar_cache.py) and revalidated on re-runs
+- Shared token-bucket rate limit, Retry-After and jittered backoff (rate_limit.py)
+- LastModifiedUtc queries for incremental sync
+- Bulk /eventitems retrieval ($top/$skip paged) grouped by EventItemEventId
+- Individual member votes from /votes and /rollcalls (API-first vote path)
+- Batch-prefetched, memoized matter IndexName lookup
+- Streaming decoder for large pages (ijson if installed, else chunked)
+- Date-sharded concurrent event discovery over arbitrary month ranges
+- Requests, retries and bytes downloaded counted in run_metrics.py
+- Optional asyncio transport for bulk lookups (set_async_concurrency, httpx)
+"""
+
+import os
+import re
+import json
+import time
+import codecs
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from legistar_cache import ResponseCache, MatterIndexStore, ItemSummaryStore, build_probe_url
+from rate_limit import get_bucket, backoff_delay, retry_after_seconds, RETRY_STATUSES
+import run_metrics
+
+BASE_URL = "https://webapi.legistar.com/v1/phoenix"
+
+# Max requests in flight at once (also the size of the connection pool)
+MAX_WORKERS = 8
+
+# Legistar caps every response at 1000 records
+PAGE_SIZE = 1000
+
+# Event IDs per bulk /eventitems query (keeps the $filter URL short)
+BULK_CHUNK_SIZE = 40
+
+# Matters looked up per concurrent batch when prefetching indexes
+MATTER_BATCH_SIZE = 100
+
+# Monthly event shards fetched at once during discovery. More threads than
+# pooled connections would only churn sockets: every request waits on the
+# same token bucket anyway.
+SHARD_WORKERS = MAX_WORKERS
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_cache = None
+_cache_enabled = True
+_async_concurrency = 0
+_matter_index_store = None
+_item_summary_store = None
+
+
+def get_session():
+    """
+    Return the pooled session for this process.
+
+    The session is rebuilt after a fork so multiprocessing workers never
+    share sockets with their parent.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+            _session_pid = os.getpid()
+        return _session
+
+
+def get_cache():
+    """Return the shared response cache, or None if caching is disabled."""
+    global _cache
+    if not _cache_enabled:
+        return None
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def get_matter_index_store():
+    """Return the shared matter index memo, or None if caching is disabled."""
+    global _matter_index_store
+    if not _cache_enabled:
+        return None
+    if _matter_index_store is None:
+        _matter_index_store = MatterIndexStore()
+    return _matter_index_store
+
+
+def get_item_summary_store():
+    """Return the shared item summary store, or None if caching is disabled."""
+    global _item_summary_store
+    if not _cache_enabled:
+        return None
+    if _item_summary_store is None:
+        _item_summary_store = ItemSummaryStore()
+    return _item_summary_store
+
+
+def set_cache_enabled(enabled):
+    """Turn the on-disk response cache on or off for this process."""
+    global _cache_enabled
+    _cache_enabled = enabled
+
+
+def set_async_concurrency(max_concurrency):
+    """
+    Route fetch_many through the asyncio client (legistar_async.py) with up
+    to max_concurrency requests in flight; 0 goes back to the thread pool.
+    The shared token bucket still sets the request rate.
+    """
+    global _async_concurrency
+    if max_concurrency:
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError("httpx not installed. Run: pip install httpx")
+    _async_concurrency = max_concurrency
+
+
+def _request(url, parse, retries=3, retry_delay=2, verbose=True):
+    """
+    GET url over the pooled session and return parse(response), with retries.
+
+    Requests are paced by the shared token bucket. Throttling responses
+    honor Retry-After; other failures back off exponentially with jitter.
+    Client errors (e.g. 404) are not retried.
+    """
+    session = get_session()
+    bucket = get_bucket()
+    for attempt in range(retries):
+        bucket.acquire()
+        try:
+            response = session.get(url, timeout=30)
+            run_metrics.count("api_requests")
+            run_metrics.count("api_bytes", len(response.content))
+            if response.status_code in RETRY_STATUSES:
+                wait = retry_after_seconds(response.headers)
+                if wait is not None:
+                    bucket.pause(wait)
+            elif 400 <= response.status_code < 500:
+                if verbose:
+                    print(f"  Request failed ({response.status_code}): {url}")
+                return None
+            response.raise_for_status()
+            return parse(response)
+        except Exception as e:
+            if verbose:
+                print(f"  Attempt {attempt + 1} failed: {e}")
+            if attempt < retries - 1:
+                run_metrics.count("api_retries")
+                time.sleep(backoff_delay(attempt, base=retry_delay))
+    return None
+
+
+def _request_json(url, retries=3, retry_delay=2, verbose=True):
+    """GET url and decode JSON (see _request)."""
+    return _request(url, lambda response: response.json(), retries, retry_delay, verbose)
+
+
+def fetch_text(url, retries=3, retry_delay=2, verbose=True):
+    """
+    GET a web page (e.g. a Legistar HistoryDetail.aspx) as text, uncached.
+
+    Same pooled session, rate limit and retry rules as the API calls.
+    """
+    return _request(url, lambda response: response.text, retries, retry_delay, verbose)
+
+
+def fetch_json(url, retries=3, retry_delay=2, verbose=True, validator=None, refresh=False):
+    """
+    Fetch JSON from URL with retry logic, going through the response cache.
+
+    validator: optional token (e.g. EventLastModifiedUtc of the parent event).
+    A cached entry is served without any network call while it is within its
+    TTL and was stored with the same validator. Expired entries are
+    revalidated with a one-record probe on their *LastModifiedUtc field
+    before falling back to a full download.
+
+    refresh: skip the cache lookup and always hit the API (the fresh response
+    is still stored).
+    """
+    cache = get_cache()
+    entry = cache.get(url) if cache and not refresh else None
+    if entry:
+        if cache.is_fresh(entry, validator):
+            return entry["data"]
+        if entry["modified_field"]:
+            probe_url = build_probe_url(url, entry["modified_field"], entry["modified_max"])
+            changed = _request_json(probe_url, retries=1, verbose=False)
+            if changed == []:
+                cache.renew(url, validator)
+                return entry["data"]
+
+    data = _request_json(url, retries=retries, retry_delay=retry_delay, verbose=verbose)
+    if data is not None and cache:
+        cache.put(url, data, validator)
+    return data
+
+
+def fetch_many(urls, max_workers=MAX_WORKERS, validators=None, **kwargs):
+    """
+    Fetch several URLs concurrently.
+
+    Returns a list of results in the same order as urls (None for failures).
+    validators, if given, is a list aligned with urls. Extra keyword
+    arguments are passed through to fetch_json. With set_async_concurrency
+    on, the URLs go through the asyncio client instead of max_workers threads.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    validators = list(validators) if validators is not None else [None] * len(urls)
+    if _async_concurrency:
+        from legistar_async import fetch_many_async
+        return fetch_many_async(urls, max_concurrency=_async_concurrency, validators=validators, **kwargs)
+    workers = max(1, min(max_workers, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda pair: fetch_json(pair[0], validator=pair[1], **kwargs),
+            zip(urls, validators)
+        ))
+
+
+def fetch_all_pages(url, page_size=PAGE_SIZE, **kwargs):
+    """
+    Fetch every record behind a collection URL, paging with $top/$skip.
+
+    Returns None if any page fails, so callers never mistake a partial
+    result for a complete one.
+    """
+    sep = "&" if "?" in url else "?"
+    records = []
+    skip = 0
+    while True:
+        page = fetch_json(f"{url}{sep}$top={page_size}&$skip={skip}", **kwargs)
+        if page is None:
+            return None
+        records.extend(page)
+        if len(page) < page_size:
+            return records
+        skip += page_size
+
+
+# Characters that can continue a JSON number
+NUMBER_CHARS = "0123456789.eE+-"
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a top-level JSON array from an iterable of text chunks.
+
+    Only the element currently being decoded is buffered, so memory stays
+    flat no matter how long the array is.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = False
+    for chunk in chunks:
+        buf += chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element not complete yet
+            if not buf[end:].lstrip(NUMBER_CHARS):
+                break  # a trailing number could still continue in the next chunk ("-0." + "5")
+            yield record
+            pos = end
+        buf = buf[pos:]
+    raise ValueError("JSON array ended early")
+
+
+def _iter_response_records(response):
+    """Stream records out of a JSON array response (ijson if available)."""
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+    if ijson is not None:
+        response.raw.decode_content = True
+        yield from ijson.items(response.raw, "item", use_float=True)
+        return
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")()
+    chunks = (decoder.decode(chunk) for chunk in response.iter_content(chunk_size=64 * 1024))
+    yield from iter_json_array(chunks)
+
+
+def stream_records(url, retries=3, retry_delay=2):
+    """
+    Yield the records of one JSON array page as they arrive.
+
+    Bypasses the response cache (nothing is held to store). Connection
+    errors are retried before the first record; a failure mid-stream raises.
+    """
+    session = get_session()
+    bucket = get_bucket()
+    for attempt in range(retries):
+        bucket.acquire()
+        try:
+            response = session.get(url, timeout=30, stream=True)
+            run_metrics.count("api_requests")
+            if response.status_code in RETRY_STATUSES:
+                wait = retry_after_seconds(response.headers)
+                if wait is not None:
+                    bucket.pause(wait)
+            response.raise_for_status()
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            print(f"  Attempt {attempt + 1} failed: {e}")
+            run_metrics.count("api_retries")
+            time.sleep(backoff_delay(attempt, base=retry_delay))
+            continue
+        with response:
+            yield from _iter_response_records(response)
+            run_metrics.count("api_bytes", response.raw.tell())
+        return
+
+
+def stream_all_pages(url, page_size=PAGE_SIZE):
+    """Yield every record behind a collection URL, streaming each $top/$skip page."""
+    sep = "&" if "?" in url else "?"
+    skip = 0
+    while True:
+        count = 0
+        for record in stream_records(f"{url}{sep}$top={page_size}&$skip={skip}"):
+            count += 1
+            yield record
+        if count < page_size:
+            return
+        skip += page_size
+
+
+def month_shards(from_month, to_month):
+    """
+    Split an inclusive "YYYY-MM".."YYYY-MM" range into monthly date windows.
+
+    Returns [(start_date, end_date), ...] with end_date exclusive,
+    e.g. ("2024-01-01", "2024-02-01").
+    """
+    year, month = (int(part) for part in from_month.split("-"))
+    last_year, last_month = (int(part) for part in to_month.split("-"))
+    shards = []
+    while (year, month) <= (last_year, last_month):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        shards.append((f"{year}-{month:02d}-01", f"{next_year}-{next_month:02d}-01"))
+        year, month = next_year, next_month
+    return shards
+
+
+def get_events_sharded(body_id, from_month, to_month, max_workers=SHARD_WORKERS):
+    """
+    Get a body's events for an inclusive month range, one query per month.
+
+    All monthly shards are fetched concurrently and merged, deduplicated by
+    EventId and sorted by date. Returns None if any shard failed, so a
+    backfill never silently skips a month.
+    """
+    shards = month_shards(from_month, to_month)
+    urls = [
+        f"{BASE_URL}/events?$filter=EventBodyId eq {body_id} and "
+        f"EventDate ge datetime'{start}' and EventDate lt datetime'{end}'&$orderby=EventDate asc"
+        for start, end in shards
+    ]
+    print(f"Fetching events {from_month} to {to_month} ({len(shards)} monthly shards)...")
+    results = fetch_many(urls, max_workers=max_workers)
+
+    events_by_id = {}
+    failed = [start[:7] for (start, _), events in zip(shards, results) if events is None]
+    if failed:
+        print(f"  Error: could not fetch events for {', '.join(failed)}")
+        return None
+    for events in results:
+        for event in events:
+            events_by_id.setdefault(event.get("EventId"), event)
+    events = sorted(events_by_id.values(), key=lambda event: event.get("EventDate") or "")
+    print(f"  Found {len(events)} events")
+    return events
+
+
+def get_modified_events(body_id, since):
+    """Get a body's events whose EventLastModifiedUtc is after `since`."""
+    url = (f"{BASE_URL}/events?$filter=EventBodyId eq {body_id} and "
+           f"EventLastModifiedUtc gt datetime'{since}'&$orderby=EventId asc")
+    return fetch_all_pages(url, refresh=True)
+
+
+def get_modified_item_event_ids(since):
+    """
+    Find events with agenda items modified after `since` (any body).
+
+    The /eventitems result can be large after a long gap, so it is streamed
+    and reduced on the fly. Returns (set of EventIds, newest
+    EventItemLastModifiedUtc seen), or (None, since) if the query failed.
+    """
+    url = (f"{BASE_URL}/eventitems?$filter=EventItemLastModifiedUtc gt datetime'{since}'"
+           f"&$orderby=EventItemId asc")
+    event_ids = set()
+    newest = since
+    try:
+        for item in stream_all_pages(url):
+            event_ids.add(item.get("EventItemEventId"))
+            newest = max(newest, item.get("EventItemLastModifiedUtc") or "")
+    except Exception as e:
+        print(f"  Error reading modified event items: {e}")
+        return None, since
+    return event_ids, newest
+
+
+def get_events_by_id(event_ids, max_workers=MAX_WORKERS):
+    """Get full event records for a list of EventIds (missing ones are dropped)."""
+    event_ids = list(event_ids)
+    urls = [f"{BASE_URL}/events/{event_id}" for event_id in event_ids]
+    return [event for event in fetch_many(urls, max_workers=max_workers, refresh=True) if event]
+
+
+def get_event_items(event_id, validator=None):
+    """Get all agenda items for an event."""
+    url = f"{BASE_URL}/events/{event_id}/eventitems"
+    return fetch_json(url, validator=validator) or []
+
+
+def _fetch_event_items_chunk(events, refresh=False):
+    """
+    Fetch agenda items for a chunk of events with one paged /eventitems query.
+
+    Returns {EventId: [items]} or None if the query failed.
+    """
+    clause = " or ".join(f"EventItemEventId eq {event.get('EventId')}" for event in events)
+    url = (f"{BASE_URL}/eventitems?$filter={clause}"
+           f"&$orderby=EventItemEventId,EventItemAgendaSequence,EventItemId")
+    # The chunk's cache entry is stale once any of its events changed
+    stamps = "|".join(f"{event.get('EventId')}:{event.get('EventLastModifiedUtc') or ''}" for event in events)
+    validator = hashlib.sha1(stamps.encode("utf-8")).hexdigest()
+
+    records = fetch_all_pages(url, validator=validator, refresh=refresh)
+    if records is None:
+        return None
+    grouped = {event.get("EventId"): [] for event in events}
+    for item in records:
+        grouped.setdefault(item.get("EventItemEventId"), []).append(item)
+    return grouped
+
+
+def get_event_items_bulk(events, chunk_size=BULK_CHUNK_SIZE, max_workers=MAX_WORKERS, refresh=False):
+    """
+    Get agenda items for many events with a few large /eventitems queries.
+
+    Events are split into chunks of chunk_size IDs; each chunk is one
+    "EventItemEventId eq ... or ..." query paged with $top/$skip, and the
+    chunks run concurrently. Results are grouped by EventItemEventId.
+    Returns ({EventId: [items]}, [events whose chunk failed]).
+    """
+    events = list(events)
+    chunks = [events[i:i + chunk_size] for i in range(0, len(events), chunk_size)]
+    if not chunks:
+        return {}, []
+    items_by_event = {}
+    failed = []
+    workers = max(1, min(max_workers, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda chunk: _fetch_event_items_chunk(chunk, refresh=refresh), chunks)
+        for chunk, grouped in zip(chunks, results):
+            if grouped is None:
+                failed.extend(chunk)
+            else:
+                items_by_event.update(grouped)
+    return items_by_event, failed
+
+
+def get_event_items_many(events, max_workers=MAX_WORKERS, refresh=False, bulk=True):
+    """
+    Get agenda items for several events at once, keyed by EventId.
+
+    Uses bulk /eventitems queries first; any events they could not cover are
+    fetched one by one (concurrently) from /events/{id}/eventitems.
+    Each event's EventLastModifiedUtc is used as the cache validator, so
+    changed meetings are downloaded again; unchanged ones are served from
+    disk within the cache TTL and then revalidated with an
+    EventItemLastModifiedUtc probe (item edits do not touch the event). Pass
+    refresh=True when the items are known to have changed.
+
+    Events whose items could not be fetched map to None, so callers can tell
+    a failed fetch from a meeting with an empty agenda ([]).
+    """
+    events = list(events)
+    items_by_event = {}
+    if bulk:
+        items_by_event, events = get_event_items_bulk(events, max_workers=max_workers, refresh=refresh)
+        if events:
+            print(f"  Bulk item query failed for {len(events)} events; fetching them individually")
+
+    event_ids = [event.get("EventId") for event in events]
+    urls = [f"{BASE_URL}/events/{event_id}/eventitems" for event_id in event_ids]
+    validators = [event.get("EventLastModifiedUtc") for event in events]
+    results = fetch_many(urls, max_workers=max_workers, validators=validators, refresh=refresh)
+    for event_id, items in zip(event_ids, results):
+        items_by_event[event_id] = items
+    return items_by_event
+
+
+def get_file_number(item):
+    """File number for an agenda item (EventItemMatterFile, else NN-NNNN in the title)."""
+    matter_file = item.get("EventItemMatterFile", "") or ""
+    if matter_file:
+        return matter_file
+    title = item.get("EventItemTitle", "") or ""
+    match = re.search(r'(\d{2}-\d+)', title)
+    return match.group(1) if match else ""
+
+
+def resolve_member_name(name, member_names):
+    """
+    Map an API person name onto one of the roster's names.
+
+    The API sometimes returns only a last name (e.g. "Pastor"), while the
+    rosters use full names. Unknown or ambiguous names are returned unchanged.
+    """
+    if name in member_names:
+        return name
+    last = name.split()[-1].lower() if name.split() else ""
+    matches = [member for member in member_names if member.split()[-1].lower() == last]
+    return matches[0] if len(matches) == 1 else name
+
+
+def get_votes_many(items, max_workers=MAX_WORKERS):
+    """
+    Get individual member votes for agenda items from the API, concurrently.
+
+    Items that had an action are looked up in /eventitems/{id}/votes and
+    roll call items in /eventitems/{id}/rollcalls; every request goes out
+    through the same thread pool. Returns {EventItemId: {person name: vote}}
+    for items the API has votes for.
+    """
+    items = [item for item in items if item.get("EventItemId")]
+    vote_items = [item for item in items
+                  if item.get("EventItemPassedFlag") is not None or item.get("EventItemTally")]
+    roll_call_items = [item for item in items if item.get("EventItemRollCallFlag") == 1]
+
+    urls = ([f"{BASE_URL}/eventitems/{item['EventItemId']}/votes" for item in vote_items] +
+            [f"{BASE_URL}/eventitems/{item['EventItemId']}/rollcalls" for item in roll_call_items])
+    validators = [item.get("EventItemLastModifiedUtc") for item in vote_items + roll_call_items]
+    results = fetch_many(urls, max_workers=max_workers, validators=validators, verbose=False)
+
+    votes_by_item = {}
+    for item, records in zip(vote_items, results[:len(vote_items)]):
+        for record in records or []:
+            name = (record.get("VotePersonName") or "").strip()
+            value = (record.get("VoteValueName") or "").strip()
+            if name and value:
+                votes_by_item.setdefault(item["EventItemId"], {})[name] = value
+    for item, records in zip(roll_call_items, results[len(vote_items):]):
+        for record in records or []:
+            name = (record.get("RollCallPersonName") or "").strip()
+            value = (record.get("RollCallValueName") or "").strip()
+            if name and value:
+                votes_by_item.setdefault(item["EventItemId"], {}).setdefault(name, value)
+    return votes_by_item
+
+
+def get_api_item_votes(items, member_names, votes_by_item):
+    """
+    Convert API votes into the scraper's shape for one meeting.
+
+    Returns (item_votes {file_number: {member: vote}}, absent_members set),
+    the same structure scrape_meeting produces from Action Details popups.
+    """
+    item_votes = {}
+    absent_members = set()
+    for item in items:
+        votes = votes_by_item.get(item.get("EventItemId"))
+        file_number = get_file_number(item)
+        if not votes or not file_number:
+            continue
+        resolved = {resolve_member_name(name, member_names): vote for name, vote in votes.items()}
+        item_votes[file_number] = resolved
+        for member, vote in resolved.items():
+            if vote.lower() == "absent":
+                absent_members.add(member)
+    return item_votes, absent_members
+
+
+def get_matter_index_names(matter_ids, batch_size=MATTER_BATCH_SIZE, max_workers=MAX_WORKERS):
+    """
+    Get the IndexName (district, Citywide, ...) for every matter in a run.
+
+    Memoized lookups are served from disk; the rest are fetched from
+    /matters/{id}/indexes in batches of batch_size, each batch concurrently,
+    and memoized for later runs. Returns {matter_id: IndexName}; matters
+    without an index map to "", failed lookups are left out.
+    """
+    matter_ids = sorted({matter_id for matter_id in matter_ids if matter_id})
+    store = get_matter_index_store()
+    index_names = store.get_many(matter_ids) if store else {}
+    missing = [matter_id for matter_id in matter_ids if matter_id not in index_names]
+    if missing:
+        print(f"  Fetching indexes for {len(missing)} matters ({len(index_names)} memoized)")
+
+    for i in range(0, len(missing), batch_size):
+        batch = missing[i:i + batch_size]
+        urls = [f"{BASE_URL}/matters/{matter_id}/indexes" for matter_id in batch]
+        fetched = {}
+        for matter_id, indexes in zip(batch, fetch_many(urls, max_workers=max_workers, verbose=False)):
+            if indexes is not None:
+                fetched[matter_id] = indexes[0].get("IndexName", "") if indexes else ""
+        if store:
+            store.put_many(fetched)
+        index_names.update(fetched)
+    return index_names
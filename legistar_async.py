@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Asyncio Legistar API client.
+
+Features:
+- httpx.AsyncClient with a keep-alive connection pool
+- Configurable max concurrency (asyncio semaphore)
+- Shared token bucket with the sync client (see rate_limit.py)
+- Retry-After handling and exponential backoff with jitter
+- Same on-disk response cache as legistar_api.fetch_json (SQLite calls run
+  in a thread so they never block the event loop)
+- Used by legistar_api.fetch_many for every bulk lookup (agenda items,
+  votes, matter indexes, events by id) once set_async_concurrency() is on,
+  e.g. fetch_data_parallel.py --api-concurrency 16
+
+Usage:
+    async with AsyncLegistarClient(max_concurrency=16) as client:
+        events = await client.get_events(138, "2024-01-01", "2024-04-01")
+        items = await client.fetch_many(
+            [f"{BASE_URL}/events/{e['EventId']}/eventitems" for e in events]
+        )
+
+Requires httpx (pip install httpx).
+"""
+
+import asyncio
+
+import run_metrics
+from legistar_api import BASE_URL, get_cache
+from legistar_cache import build_probe_url
+from rate_limit import get_bucket, backoff_delay, retry_after_seconds, RETRY_STATUSES
+
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncLegistarClient:
+    """Concurrent, rate-limited client for the Legistar endpoints we use."""
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, bucket=None, retries=4,
+                 retry_delay=1.0, timeout=30, use_cache=True):
+        self.max_concurrency = max_concurrency
+        self.bucket = bucket or get_bucket()
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.cache = get_cache() if use_cache else None
+        self.client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError("httpx not installed. Run: pip install httpx")
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency
+        )
+        self.client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.aclose()
+        self.client = None
+
+    async def _request_json(self, url, retries=None, verbose=True):
+        """GET url and decode JSON, honoring the rate limit and Retry-After."""
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries):
+            await self.bucket.acquire_async()
+            try:
+                async with self._semaphore:
+                    response = await self.client.get(url)
+                run_metrics.count("api_requests")
+                run_metrics.count("api_bytes", len(response.content))
+                if response.status_code in RETRY_STATUSES:
+                    wait = retry_after_seconds(response.headers)
+                    if wait is not None:
+                        self.bucket.pause(wait)
+                elif 400 <= response.status_code < 500:
+                    if verbose:
+                        print(f"  Request failed ({response.status_code}): {url}")
+                    return None
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if verbose:
+                    print(f"  Attempt {attempt + 1} failed: {e}")
+                if attempt < retries - 1:
+                    run_metrics.count("api_retries")
+                    await asyncio.sleep(backoff_delay(attempt, base=self.retry_delay))
+        return None
+
+    async def fetch_json(self, url, validator=None, refresh=False, verbose=True):
+        """Fetch JSON through the response cache (same rules as legistar_api.fetch_json)."""
+        entry = await asyncio.to_thread(self.cache.get, url) if self.cache and not refresh else None
+        if entry:
+            if self.cache.is_fresh(entry, validator):
+                return entry["data"]
+            if entry["modified_field"]:
+                probe_url = build_probe_url(url, entry["modified_field"], entry["modified_max"])
+                if await self._request_json(probe_url, retries=1, verbose=False) == []:
+                    await asyncio.to_thread(self.cache.renew, url, validator)
+                    return entry["data"]
+
+        data = await self._request_json(url, verbose=verbose)
+        if data is not None and self.cache:
+            await asyncio.to_thread(self.cache.put, url, data, validator)
+        return data
+
+    async def fetch_many(self, urls, validators=None, **kwargs):
+        """Fetch several URLs concurrently; results are in input order."""
+        urls = list(urls)
+        validators = list(validators) if validators is not None else [None] * len(urls)
+        return await asyncio.gather(*[
+            self.fetch_json(url, validator=validator, **kwargs)
+            for url, validator in zip(urls, validators)
+        ])
+
+    async def get_events(self, body_id, start_date, end_date):
+        """Get a body's events with start_date <= EventDate < end_date."""
+        url = (f"{BASE_URL}/events?$filter=EventBodyId eq {body_id} and "
+               f"EventDate ge datetime'{start_date}' and EventDate lt datetime'{end_date}'"
+               f"&$orderby=EventDate asc")
+        return await self.fetch_json(url) or []
+
+    async def get_event_items(self, event_id, validator=None):
+        """Get all agenda items for an event."""
+        url = f"{BASE_URL}/events/{event_id}/eventitems"
+        return await self.fetch_json(url, validator=validator) or []
+
+    async def get_roll_calls(self, event_item_id):
+        """Get roll call records for an event item."""
+        url = f"{BASE_URL}/eventitems/{event_item_id}/rollcalls"
+        return await self.fetch_json(url, verbose=False) or []
+
+    async def get_votes(self, event_item_id):
+        """Get individual votes for an event item."""
+        url = f"{BASE_URL}/eventitems/{event_item_id}/votes"
+        return await self.fetch_json(url, verbose=False) or []
+
+    async def get_matter(self, matter_id):
+        """Get a matter record."""
+        return await self.fetch_json(f"{BASE_URL}/matters/{matter_id}")
+
+    async def get_matter_indexes(self, matter_id):
+        """Get the index records (district, Citywide, ...) for a matter."""
+        url = f"{BASE_URL}/matters/{matter_id}/indexes"
+        return await self.fetch_json(url, verbose=False) or []
+
+
+def fetch_many_async(urls, max_concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    """Synchronous wrapper: fetch URLs with the async client and return the results."""
+    async def _run():
+        async with AsyncLegistarClient(max_concurrency=max_concurrency) as client:
+            return await client.fetch_many(urls, **kwargs)
+    return asyncio.run(_run())
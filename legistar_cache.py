@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+On-disk SQLite cache for Legistar API responses.
+
+Features:
+- Entries keyed by URL, stored zlib-compressed
+- TTL per entry; expired entries are revalidated, not blindly refetched
+- Size-bounded with least-recently-used eviction
+- Safe to share between threads and multiprocessing workers
+- Separate long-lived memo of matter -> IndexName lookups
+- Item summaries scraped from LegislationDetail pages, keyed by file number
+- Per-meeting checkpoints of finished extraction results (for --resume)
+
+Revalidation:
+- A caller may pass a validator (e.g. the parent event's EventLastModifiedUtc
+  from the /events listing). An entry stored with a different one is stale
+  even within its TTL; a matching one does not extend the TTL, because edits
+  to the items alone (votes, tallies, action text) leave the event untouched.
+- The newest *LastModifiedUtc value in the payload (e.g.
+  EventItemLastModifiedUtc) is kept, so an expired entry can be checked with a
+  cheap "$filter=... gt datetime'...'&$top=1" probe instead of a full download.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+CACHE_DIR = os.environ.get(
+    "LEGISTAR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".legistar_cache")
+)
+
+DEFAULT_TTL = 24 * 60 * 60  # 1 day
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB of compressed payloads
+
+# Matter indexes (district, Citywide) almost never change once assigned
+MATTER_INDEX_TTL = 30 * 24 * 60 * 60  # 30 days
+
+# Item summaries on LegislationDetail pages are fixed once the agenda is published
+ITEM_SUMMARY_TTL = 30 * 24 * 60 * 60  # 30 days
+
+
+def find_last_modified(data):
+    """
+    Return (field, newest value) for the *LastModifiedUtc field of a payload.
+
+    Works for a single record or a list of records. Returns ("", "") if the
+    payload carries no modification timestamps.
+    """
+    records = data if isinstance(data, list) else [data]
+    field = ""
+    newest = ""
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        for key, value in record.items():
+            if key.endswith("LastModifiedUtc") and value:
+                if not field:
+                    field = key
+                if key == field and value > newest:
+                    newest = value
+    return field, newest
+
+
+def build_probe_url(url, field, since):
+    """
+    Build a URL that returns at most one record modified after `since`.
+
+    An empty response means the cached payload for `url` is still current.
+    """
+    clause = f"{field} gt datetime'{since}'"
+    url = re.sub(r"[&?]\$(top|skip)=\d+", "", url)
+    if "$filter=" in url:
+        base, rest = url.split("$filter=", 1)
+        expr, sep, tail = rest.partition("&")
+        url = f"{base}$filter={clause} and ({expr}){sep}{tail}"
+    else:
+        url += ("&" if "?" in url else "?") + f"$filter={clause}"
+    return url + ("&" if "?" in url else "?") + "$top=1"
+
+
+class SQLiteStore(ABC):
+    """Base for the on-disk stores: one lazily opened, fork-safe connection."""
+
+    # WAL needs shared memory between processes, so stores on network volumes use "DELETE"
+    journal_mode = "WAL"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connect(self):
+        """Open (or reopen after fork) the database connection."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            self._init_schema(conn)
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @abstractmethod
+    def _init_schema(self, conn):
+        """Create this store's tables."""
+
+
+class ResponseCache(SQLiteStore):
+    """SQLite-backed response cache with TTL and LRU eviction."""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(path or os.path.join(CACHE_DIR, "responses.sqlite"))
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _init_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                validator TEXT,
+                modified_field TEXT,
+                modified_max TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+
+    def get(self, url):
+        """Return the cached entry for url as a dict, or None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body, validator, modified_field, modified_max, fetched_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+        body, validator, modified_field, modified_max, fetched_at = row
+        return {
+            "data": json.loads(zlib.decompress(body)),
+            "validator": validator or "",
+            "modified_field": modified_field or "",
+            "modified_max": modified_max or "",
+            "fetched_at": fetched_at,
+        }
+
+    def is_fresh(self, entry, validator=None):
+        """
+        True if entry can be served without touching the network: it is
+        within its TTL and was not stored with a different validator.
+        """
+        if validator and entry["validator"] and entry["validator"] != validator:
+            return False
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def put(self, url, data, validator=None):
+        """Store a response, evicting least-recently-used entries if over size."""
+        body = zlib.compress(json.dumps(data).encode("utf-8"))
+        modified_field, modified_max = find_last_modified(data)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, len(body), validator or "", modified_field, modified_max, now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def renew(self, url, validator=None):
+        """Mark an entry as revalidated (restarts its TTL)."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if validator:
+                conn.execute(
+                    "UPDATE responses SET fetched_at = ?, accessed_at = ?, validator = ? WHERE url = ?",
+                    (now, now, validator, url)
+                )
+            else:
+                conn.execute(
+                    "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                    (now, now, url)
+                )
+            conn.commit()
+
+    def _evict(self, conn):
+        """Drop least-recently-used entries until the cache fits max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        to_free = total - self.max_bytes
+        freed = 0
+        victims = []
+        for url, size in conn.execute("SELECT url, size FROM responses ORDER BY accessed_at ASC"):
+            victims.append((url,))
+            freed += size
+            if freed >= to_free:
+                break
+        conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+
+class KeyedTTLStore(SQLiteStore):
+    """
+    One value per key, kept across runs and served while younger than ttl.
+    Subclasses name the table and columns (and the key's SQL type).
+    """
+
+    table = None
+    key_column = "key"
+    key_type = "TEXT"
+    value_column = "value"
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        super().__init__(path or os.path.join(CACHE_DIR, "responses.sqlite"))
+        self.ttl = ttl
+
+    def _init_schema(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                {self.key_column} {self.key_type} PRIMARY KEY,
+                {self.value_column} TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys stored within the TTL."""
+        keys = list(keys)
+        cutoff = time.time() - self.ttl
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT {self.key_column}, {self.value_column} FROM {self.table} "
+                    f"WHERE fetched_at >= ? AND {self.key_column} IN ({placeholders})",
+                    [cutoff] + chunk
+                )
+                found.update(dict(rows))
+        return found
+
+    def put_many(self, values):
+        """Store {key: value}."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in values.items()]
+            )
+            conn.commit()
+
+
+class MatterIndexStore(KeyedTTLStore):
+    """Memo of matter IndexName lookups ("" for matters without an index), kept across runs."""
+
+    table = "matter_indexes"
+    key_column = "matter_id"
+    key_type = "INTEGER"
+    value_column = "index_name"
+
+    def __init__(self, path=None, ttl=MATTER_INDEX_TTL):
+        super().__init__(path, ttl)
+
+
+class ItemSummaryStore(KeyedTTLStore):
+    """Item summaries (LegislationDetail pages) by file number, kept across runs."""
+
+    table = "item_summaries"
+    key_column = "file_number"
+    value_column = "summary"
+
+    def __init__(self, path=None, ttl=ITEM_SUMMARY_TTL):
+        super().__init__(path, ttl)
+
+
+class CheckpointStore(SQLiteStore):
+    """
+    Finished meeting results per fetcher, keyed by EventId and
+    EventLastModifiedUtc, so an interrupted run can skip completed meetings.
+    A checkpoint is only reused while the meeting is unchanged in the API.
+    """
+
+    def __init__(self, path=None):
+        super().__init__(path or os.path.join(CACHE_DIR, "responses.sqlite"))
+
+    def _init_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                fetcher TEXT NOT NULL,
+                event_id INTEGER NOT NULL,
+                last_modified TEXT NOT NULL,
+                result BLOB NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (fetcher, event_id)
+            )
+        """)
+
+    def get_many(self, fetcher, events):
+        """Return {event_id: result} for events checkpointed at their current EventLastModifiedUtc."""
+        wanted = {event.get("EventId"): event.get("EventLastModifiedUtc") or "" for event in events}
+        found = {}
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT event_id, last_modified, result FROM checkpoints WHERE fetcher = ?", (fetcher,)
+            ).fetchall()
+        for event_id, last_modified, result in rows:
+            if event_id in wanted and wanted[event_id] == last_modified:
+                found[event_id] = json.loads(zlib.decompress(result))
+        return found
+
+    def put(self, fetcher, event, result):
+        """Checkpoint one finished meeting (result must be JSON-serializable)."""
+        body = zlib.compress(json.dumps(result).encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)",
+                (fetcher, event.get("EventId"), event.get("EventLastModifiedUtc") or "", body, time.time())
+            )
+            conn.commit()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+One-call snapshot of a Legistar meeting page.
+
+Reading the page element by element (query_selector_all + text_content /
+get_attribute per element) costs one browser round trip per call, i.e.
+thousands per meeting. MEETING_SNAPSHOT_JS collects everything the scrapers
+need in a single page.evaluate():
+- document links (Agenda / Minutes / Results View.ashx files)
+- agenda grid rows: file number and its LegislationDetail link
+- every "Action details" link, in page order, with its row text and target
+
+snapshot_from_html() builds the same snapshot from saved HTML (lxml if
+installed, else html.parser), for re-parsing archived pages offline.
+
+Usage:
+    meeting = parse_meeting_snapshot(page.evaluate(MEETING_SNAPSHOT_JS))
+    meeting["agenda_url"], meeting["item_detail_urls"], meeting["actions"]
+"""
+
+import re
+from html.parser import HTMLParser
+
+WEBSITE_BASE = "https://phoenix.legistar.com"
+
+FILE_NUMBER_PATTERN = re.compile(r"(\d{2}-\d+)")
+
+# Matches the same links, in the same order, as the snapshot's "actions"
+ACTION_DETAILS_SELECTOR = "a:has-text('Action details')"
+
+MEETING_SNAPSHOT_JS = """
+() => {
+    const text = el => (el.textContent || '').trim();
+    const links = [];
+    const actions = [];
+    for (const a of document.querySelectorAll('a')) {
+        const href = a.getAttribute('href') || '';
+        const label = text(a);
+        if (href.includes('View.ashx')) {
+            links.push({text: label, href: href});
+        }
+        if (label.replace(/\\s+/g, ' ').toLowerCase().includes('action details')) {
+            actions.push({
+                row: a.closest('tr')?.textContent || '',
+                target: (a.getAttribute('onclick') || '') + ' ' + href
+            });
+        }
+    }
+    const rows = [];
+    for (const tr of document.querySelectorAll('table tr')) {
+        const cells = tr.querySelectorAll('td');
+        if (cells.length < 7) continue;
+        const link = cells[0].querySelector('a');
+        if (!link) continue;
+        rows.push({file: text(link), href: link.getAttribute('href') || ''});
+    }
+    return {links: links, rows: rows, actions: actions};
+}
+"""
+
+
+def _document_link(links, text_pattern):
+    """First View.ashx link whose text contains text_pattern (case-insensitive)."""
+    for link in links:
+        if text_pattern.lower() in link["text"].lower():
+            href = link["href"]
+            if href.startswith("/"):
+                return WEBSITE_BASE + href
+            return href
+    return ""
+
+
+def parse_meeting_snapshot(snapshot):
+    """
+    Turn a MEETING_SNAPSHOT_JS result into the fields the scrapers use.
+
+    Returns a dict with agenda_url, minutes_url, results_url,
+    item_detail_urls ({file_number: url}), actions (the raw Action details
+    links, for action_details.action_detail_targets) and action_files (the
+    file number of each Action details link, or "item_<i>" if its row has
+    none).
+    """
+    links = snapshot.get("links") or []
+
+    item_detail_urls = {}
+    for row in snapshot.get("rows") or []:
+        file_text = row["file"]
+        href = row["href"]
+        if re.match(r'^\d{2}-\d+$', file_text) and href:
+            if not href.startswith("http"):
+                href = WEBSITE_BASE + "/" + href.lstrip("/")
+            item_detail_urls[file_text] = href
+
+    actions = snapshot.get("actions") or []
+    action_files = []
+    for i, action in enumerate(actions):
+        match = FILE_NUMBER_PATTERN.search(action.get("row") or "")
+        action_files.append(match.group(1) if match else f"item_{i}")
+
+    return {
+        "agenda_url": _document_link(links, "Agenda"),
+        "minutes_url": _document_link(links, "Minutes"),
+        "results_url": _document_link(links, "Results"),
+        "item_detail_urls": item_detail_urls,
+        "actions": actions,
+        "action_files": action_files,
+    }
+
+
+class _Node:
+    """Minimal element tree node for the html.parser fallback."""
+
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.parent = parent
+        self.children = []  # _Node or str
+
+    def get(self, name):
+        return self.attrs.get(name)
+
+    def iter(self, tag):
+        for child in self.children:
+            if isinstance(child, _Node):
+                if child.tag == tag:
+                    yield child
+                yield from child.iter(tag)
+
+    def iterancestors(self, tag):
+        node = self.parent
+        while node is not None:
+            if node.tag == tag:
+                yield node
+            node = node.parent
+
+    def text_content(self):
+        return "".join(child if isinstance(child, str) else child.text_content() for child in self.children)
+
+
+class _TreeBuilder(HTMLParser):
+    """Builds a _Node tree; unmatched end tags are ignored, void tags never opened."""
+
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("#document", [])
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, attrs, self._stack[-1])
+        self._stack[-1].children.append(node)
+        if tag not in self.VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                return
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+def _parse_document(html):
+    """Root of the parsed page: lxml if installed, else a _Node tree."""
+    try:
+        import lxml.html
+    except ImportError:
+        builder = _TreeBuilder()
+        builder.feed(html)
+        builder.close()
+        return builder.root
+    return lxml.html.fromstring(html)
+
+
+def snapshot_from_html(html):
+    """
+    MEETING_SNAPSHOT_JS equivalent for saved page HTML (html_archive.py).
+    Returns the same {links, rows, actions} structure.
+    """
+    def text(el):
+        return (el.text_content() or "").strip()
+
+    doc = _parse_document(html)
+    links = []
+    actions = []
+    for a in doc.iter("a"):
+        href = a.get("href") or ""
+        label = text(a)
+        if "View.ashx" in href:
+            links.append({"text": label, "href": href})
+        if "action details" in " ".join(label.split()).lower():
+            row = next(a.iterancestors("tr"), None)
+            actions.append({
+                "row": row.text_content() if row is not None else "",
+                "target": (a.get("onclick") or "") + " " + href
+            })
+
+    rows = []
+    for tr in doc.iter("tr"):
+        if next(tr.iterancestors("table"), None) is None:
+            continue
+        cells = list(tr.iter("td"))
+        if len(cells) < 7:
+            continue
+        link = next(cells[0].iter("a"), None)
+        if link is None:
+            continue
+        rows.append({"file": text(link), "href": link.get("href") or ""})
+    return {"links": links, "rows": rows, "actions": actions}
+
+
+def snapshot_meeting(page):
+    """Snapshot a meeting page (sync Playwright page)."""
+    return parse_meeting_snapshot(page.evaluate(MEETING_SNAPSHOT_JS))
+
+
+async def snapshot_meeting_async(page):
+    """Snapshot a meeting page (async Playwright page)."""
+    return parse_meeting_snapshot(await page.evaluate(MEETING_SNAPSHOT_JS))
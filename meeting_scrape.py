@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Engine-independent part of scraping a Legistar meeting page.
+
+The process engine (fetch_data_parallel.py), the async engine
+(async_scraper.py) and the enhanced fetchers scrape a meeting the same way;
+they only differ in how they drive the browser (sync or async Playwright).
+MeetingVotes holds everything else:
+- which Action Details pages to fetch over HTTP (--http-votes)
+- which Action details links still need a popup (no votes from the API,
+  nor from an Action Details page fetched over HTTP)
+- the votes collected so far and the members marked absent
+- the meeting_data dict the scrapers return
+
+Usage:
+    votes = MeetingVotes(snapshot_meeting(page), skip_file_numbers)
+    votes.add_http_votes(fetch_action_detail_votes(votes.http_targets()))
+    for i, file_number in votes.popup_targets():
+        ... open popup i and read its votes ...
+        votes.add(file_number, popup_votes)
+    return votes.meeting_data()
+"""
+
+from action_details import action_detail_targets
+
+# Action details links clicked per meeting at most (guards against runaway pages)
+MAX_ACTION_POPUPS = 100
+
+
+class MeetingVotes:
+    """Votes and absences collected while scraping one meeting page."""
+
+    def __init__(self, meeting, skip_file_numbers=None):
+        self.meeting = meeting  # meeting_page.parse_meeting_snapshot() result
+        self.skip_file_numbers = set(skip_file_numbers or ())
+        self.item_votes = {}
+        self.absent_members = set()
+
+    def add(self, file_number, votes):
+        """Record an item's votes ({member: vote}); empty votes are ignored."""
+        if not votes:
+            return
+        self.item_votes[file_number] = votes
+        for member, vote in votes.items():
+            if vote.lower() == "absent":
+                self.absent_members.add(member)
+
+    def http_targets(self):
+        """{file_number: HistoryDetail URL} for the items still without votes."""
+        urls_by_file = action_detail_targets(self.meeting["actions"])
+        return {f: url for f, url in urls_by_file.items() if f not in self.skip_file_numbers}
+
+    def add_http_votes(self, fetched):
+        """Record the votes of Action Details pages fetched over HTTP; their popups are skipped."""
+        for file_number, votes in fetched.items():
+            self.skip_file_numbers.add(file_number)
+            self.add(file_number, votes)
+
+    def popup_targets(self):
+        """(link index, file number) of each Action details popup still to click."""
+        return [
+            (i, file_number)
+            for i, file_number in enumerate(self.meeting["action_files"][:MAX_ACTION_POPUPS])
+            if file_number not in self.skip_file_numbers
+        ]
+
+    def meeting_data(self):
+        """The scraped meeting: document URLs, item votes, detail URLs and absences."""
+        return {
+            "agenda_url": self.meeting["agenda_url"],
+            "minutes_url": self.meeting["minutes_url"],
+            "results_url": self.meeting["results_url"],
+            "item_votes": self.item_votes,
+            "item_detail_urls": self.meeting["item_detail_urls"],
+            "absent_members": self.absent_members
+        }
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Event-driven waits for the Playwright scrapers.
+
+Replaces fixed time.sleep() pauses and wait_until="networkidle" with waits on
+what the scrapers actually need:
+- Meeting / detail pages: DOMContentLoaded, then the agenda grid selector
+- Action Details popups: the RadWindow iframe's HistoryDetail.aspx response,
+  then that frame's DOMContentLoaded (the vote table is server-rendered)
+- Closing a popup: the RadWindow becoming hidden
+
+Timeouts adapt to observed latency: each kind of wait keeps a window of recent
+durations and uses a multiple of their 95th percentile, clamped to sane bounds.
+Waits never raise; a timed-out wait returns False (or None) and the scraper
+carries on with whatever the page has, exactly as it did after a fixed sleep.
+Navigations do raise, so one that misses its adaptive timeout is retried once
+at the page limit (the old fixed 60 s) first.
+
+Sync functions take playwright.sync_api objects; the *_async variants take
+playwright.async_api objects.
+"""
+
+import time
+from collections import deque
+
+# Selector present once a Legistar meeting's agenda grid has rendered
+MEETING_READY_SELECTOR = "table.rgMasterTable"
+
+# The Action Details popup is a RadWindow whose iframe loads HistoryDetail.aspx
+POPUP_URL_PATTERN = "HistoryDetail.aspx"
+POPUP_SELECTOR = "dialog, [role='dialog'], .RadWindow"
+POPUP_CLOSE_SELECTOR = "button:has-text('Close'), .rwCloseButton, [title='Close']"
+
+# (default ms before enough samples, min ms, max ms) per kind of wait
+WAIT_LIMITS = {
+    "page": (30000, 5000, 60000),
+    "ready": (10000, 2000, 20000),
+    "popup": (5000, 1000, 10000),
+    "close": (2000, 500, 5000),
+    "element": (5000, 1000, 10000),
+}
+
+# Timeout = TIMEOUT_FACTOR x p95 of the last LATENCY_WINDOW samples
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 5
+TIMEOUT_FACTOR = 3
+
+
+class LatencyTracker:
+    """Recent wait durations per kind, used to size the next timeout."""
+
+    def __init__(self, limits=None, window=LATENCY_WINDOW):
+        self.limits = limits or WAIT_LIMITS
+        self.samples = {kind: deque(maxlen=window) for kind in self.limits}
+
+    def record(self, kind, elapsed_ms):
+        """Record how long a successful wait took."""
+        self.samples[kind].append(elapsed_ms)
+
+    def percentile(self, kind, pct):
+        """Return the pct-th percentile of recorded durations (0 if none)."""
+        values = sorted(self.samples[kind])
+        if not values:
+            return 0
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+    def timeout(self, kind):
+        """Timeout in ms for the next wait of this kind."""
+        default, low, high = self.limits[kind]
+        if len(self.samples[kind]) < MIN_SAMPLES:
+            return default
+        return int(min(high, max(low, TIMEOUT_FACTOR * self.percentile(kind, 95))))
+
+    def ceiling(self, kind):
+        """Largest timeout in ms this kind of wait is ever given."""
+        return self.limits[kind][2]
+
+    def summary(self):
+        """Return {kind: (p50, p95, samples)} for kinds with samples."""
+        return {
+            kind: (self.percentile(kind, 50), self.percentile(kind, 95), len(values))
+            for kind, values in self.samples.items() if values
+        }
+
+
+# Process-wide tracker shared by every scraper in this process
+tracker = LatencyTracker()
+
+
+def _elapsed_ms(started):
+    return (time.monotonic() - started) * 1000
+
+
+def _is_popup_response(response):
+    return POPUP_URL_PATTERN in response.url
+
+
+# --- Sync API ----------------------------------------------------------------
+
+def wait_for(page, selector, kind="element", state="visible"):
+    """Wait for selector to reach state. Returns True if it did in time."""
+    started = time.monotonic()
+    try:
+        page.wait_for_selector(selector, state=state, timeout=tracker.timeout(kind))
+    except Exception:
+        return False
+    tracker.record(kind, _elapsed_ms(started))
+    return True
+
+
+def goto(page, url, ready_selector=None):
+    """
+    Navigate to url and wait for the DOM, then (optionally) ready_selector.
+    A navigation that misses the adaptive timeout is retried once at the
+    page ceiling; raises if that fails too, like page.goto().
+    """
+    started = time.monotonic()
+    try:
+        page.goto(url, wait_until="domcontentloaded", timeout=tracker.timeout("page"))
+    except Exception:
+        started = time.monotonic()
+        page.goto(url, wait_until="domcontentloaded", timeout=tracker.ceiling("page"))
+    tracker.record("page", _elapsed_ms(started))
+    if ready_selector:
+        return wait_for(page, ready_selector, kind="ready", state="attached")
+    return True
+
+
+def open_popup(page, link):
+    """
+    Click an Action details link and wait for its RadWindow iframe to load.
+
+    Returns the popup's frame, or None if no HistoryDetail response arrived in
+    time (action_details.read_popup_votes then looks the frame up by URL).
+    """
+    started = time.monotonic()
+    try:
+        with page.expect_response(_is_popup_response, timeout=tracker.timeout("popup")) as info:
+            link.click()
+        frame = info.value.frame
+        frame.wait_for_load_state("domcontentloaded", timeout=tracker.timeout("popup"))
+    except Exception:
+        wait_for(page, POPUP_SELECTOR, kind="popup")
+        return None
+    tracker.record("popup", _elapsed_ms(started))
+    return frame
+
+
+def close_popup(page):
+    """Close the open RadWindow (Close button, else Escape) and wait for it to hide."""
+    try:
+        page.locator(POPUP_CLOSE_SELECTOR).first.click(timeout=tracker.timeout("close"))
+    except Exception:
+        page.keyboard.press("Escape")
+    return wait_for(page, ".RadWindow", kind="close", state="hidden")
+
+
+# --- Async API ---------------------------------------------------------------
+
+async def wait_for_async(page, selector, kind="element", state="visible"):
+    """Async wait_for()."""
+    started = time.monotonic()
+    try:
+        await page.wait_for_selector(selector, state=state, timeout=tracker.timeout(kind))
+    except Exception:
+        return False
+    tracker.record(kind, _elapsed_ms(started))
+    return True
+
+
+async def goto_async(page, url, ready_selector=None):
+    """Async goto()."""
+    started = time.monotonic()
+    try:
+        await page.goto(url, wait_until="domcontentloaded", timeout=tracker.timeout("page"))
+    except Exception:
+        started = time.monotonic()
+        await page.goto(url, wait_until="domcontentloaded", timeout=tracker.ceiling("page"))
+    tracker.record("page", _elapsed_ms(started))
+    if ready_selector:
+        return await wait_for_async(page, ready_selector, kind="ready", state="attached")
+    return True
+
+
+async def open_popup_async(page, link):
+    """Async open_popup()."""
+    started = time.monotonic()
+    try:
+        async with page.expect_response(_is_popup_response, timeout=tracker.timeout("popup")) as info:
+            await link.click()
+        response = await info.value
+        frame = response.frame
+        await frame.wait_for_load_state("domcontentloaded", timeout=tracker.timeout("popup"))
+    except Exception:
+        await wait_for_async(page, POPUP_SELECTOR, kind="popup")
+        return None
+    tracker.record("popup", _elapsed_ms(started))
+    return frame
+
+
+async def close_popup_async(page):
+    """Async close_popup()."""
+    try:
+        await page.locator(POPUP_CLOSE_SELECTOR).first.click(timeout=tracker.timeout("close"))
+    except Exception:
+        await page.keyboard.press("Escape")
+    return await wait_for_async(page, ".RadWindow", kind="close", state="hidden")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Staged extraction engine (fetch_data_parallel.py --engine pipeline).
+
+Meetings flow through four stages connected by bounded queues:
+- api    : thread pool - agenda items, API votes and matter indexes per meeting
+- scrape : browser pool - the meeting page scrape, one worker browser each
+- build  : CSV rows for each finished meeting
+- write  : a single writer - checkpoint and flush the rows
+
+Each stage has its own number of workers. A full queue blocks the stage
+feeding it (backpressure) instead of letting finished work pile up in
+memory. Every stage reports how long its workers were busy, starved
+(waiting for input) and blocked (waiting to hand work on), and every queue
+its peak depth; a stage that is mostly blocked is waiting on the next one.
+
+Usage:
+    stats = run_pipeline(events, [
+        Stage("api", fetch_api, workers=4),
+        Stage("scrape", scrape, workers=3),
+        Stage("build", build_rows, workers=2),
+        Stage("write", write_rows, workers=1),
+    ], queue_size=6)
+"""
+
+import time
+import queue
+import threading
+
+# Seconds between queue depth reports while the pipeline runs
+REPORT_INTERVAL = 30
+
+_DONE = object()
+
+
+class MeteredQueue(queue.Queue):
+    """Bounded queue that tracks its peak depth."""
+
+    def __init__(self, name, maxsize):
+        super().__init__(maxsize)
+        self.name = name
+        self.peak = 0
+
+    def _put(self, item):
+        super()._put(item)
+        self.peak = max(self.peak, len(self.queue))
+
+
+class Stage:
+    """
+    One pipeline stage: `workers` threads applying fn to each item.
+
+    fn returns the item for the next stage, or None to drop it (the last
+    stage's return value is ignored). Exceptions are reported and, so one
+    bad meeting does not stall the pipeline, replaced by fallback(item) if
+    the stage has one, else the item is dropped (counted in `dropped`).
+    """
+
+    def __init__(self, name, fn, workers=1, fallback=None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.fallback = fallback
+        self.items = 0
+        self.errors = 0
+        self.dropped = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def _add(self, **elapsed):
+        with self._lock:
+            for field, seconds in elapsed.items():
+                setattr(self, field, getattr(self, field) + seconds)
+
+    def run(self, inbox, outbox):
+        """Worker loop: take from inbox until _DONE, pass results to outbox."""
+        while True:
+            started = time.monotonic()
+            item = inbox.get()
+            self._add(starved=time.monotonic() - started)
+            if item is _DONE:
+                return
+
+            started = time.monotonic()
+            try:
+                result = self.fn(item)
+            except Exception as e:
+                print(f"  [Pipeline] {self.name} stage error: {e}")
+                result = self._fall_back(item)
+                self._add(errors=1, dropped=int(result is None))
+            self._add(busy=time.monotonic() - started, items=1)
+
+            if result is not None and outbox is not None:
+                started = time.monotonic()
+                outbox.put(result)
+                self._add(blocked=time.monotonic() - started)
+
+    def _fall_back(self, item):
+        """fallback(item), or None if there is none or it fails too."""
+        if self.fallback is None:
+            return None
+        try:
+            return self.fallback(item)
+        except Exception as e:
+            print(f"  [Pipeline] {self.name} stage fallback error: {e}")
+            return None
+
+    def summary(self):
+        """One-line report, e.g. 'scrape x3: 45 items, busy 610s, starved 12s, blocked 3s'."""
+        text = (f"{self.name} x{self.workers}: {self.items} items, busy {self.busy:.0f}s, "
+                f"starved {self.starved:.0f}s, blocked {self.blocked:.0f}s")
+        if self.errors:
+            text += f", {self.errors} errors"
+        if self.dropped:
+            text += f", {self.dropped} dropped"
+        return text
+
+
+def _report(queues, stop):
+    """Print queue depths every REPORT_INTERVAL seconds until stop is set."""
+    while not stop.wait(REPORT_INTERVAL):
+        depths = ", ".join(f"{q.name} {q.qsize()}/{q.maxsize}" for q in queues)
+        print(f"  [Pipeline] queues: {depths}")
+
+
+def run_pipeline(items, stages, queue_size=8):
+    """
+    Push items through stages in order and wait for every stage to drain.
+
+    The feed into the first stage and each queue between stages hold at
+    most queue_size items. Prints the per-stage and per-queue metrics at
+    the end and returns the stages.
+    """
+    queues = [
+        MeteredQueue(f"->{stage.name}", queue_size)
+        for stage in stages
+    ]
+    threads = []
+    for i, stage in enumerate(stages):
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        stage_threads = [
+            threading.Thread(target=stage.run, args=(queues[i], outbox),
+                             name=f"{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        ]
+        for thread in stage_threads:
+            thread.start()
+        threads.append(stage_threads)
+
+    stop = threading.Event()
+    reporter = threading.Thread(target=_report, args=(queues, stop), daemon=True)
+    reporter.start()
+
+    try:
+        for item in items:
+            queues[0].put(item)
+        # Drain stage by stage: a stage is done once all its workers have exited
+        for i, stage in enumerate(stages):
+            for _ in range(stage.workers):
+                queues[i].put(_DONE)
+            for thread in threads[i]:
+                thread.join()
+    finally:
+        stop.set()
+
+    print("  [Pipeline] stages: " + "; ".join(stage.summary() for stage in stages))
+    print("  [Pipeline] peak queue depth: " +
+          ", ".join(f"{q.name} {q.peak}/{q.maxsize}" for q in queues))
+    return stages
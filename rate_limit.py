@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Rate limiting and retry timing shared by the sync and async Legistar clients.
+
+Features:
+- Token bucket usable from threads (acquire) and asyncio tasks (acquire_async)
+- Server-requested pauses (Retry-After) apply to every caller of the bucket
+- Exponential backoff with full jitter for retries
+- Worker processes split the rate between them (share_rate), so a pool of N
+  workers stays within LEGISTAR_RATE as a whole rather than N times it
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+# Legistar does not publish a limit; stay well under what the city tolerates.
+# Override with LEGISTAR_RATE (requests/second) and LEGISTAR_BURST.
+DEFAULT_RATE = float(os.environ.get("LEGISTAR_RATE", "10"))
+DEFAULT_BURST = int(os.environ.get("LEGISTAR_BURST", "10"))
+
+# HTTP statuses that mean "slow down / try again later"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens/second, holding at most `capacity`."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available; otherwise return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a token is available."""
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a token is available."""
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` (e.g. after a Retry-After)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            # Refill from the end of the pause, not across it (no burst on resume)
+            self.updated = self.paused_until
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+def get_bucket():
+    """Return the process-wide bucket shared by every Legistar client."""
+    global _bucket
+    with _bucket_lock:
+        if _bucket is None:
+            _bucket = TokenBucket()
+        return _bucket
+
+
+def share_rate(processes):
+    """
+    Give this process 1/processes of the rate (and burst), for one of
+    `processes` worker processes hitting Legistar at the same time.
+    """
+    global _bucket
+    processes = max(1, processes)
+    with _bucket_lock:
+        _bucket = TokenBucket(DEFAULT_RATE / processes, max(1, DEFAULT_BURST // processes))
+        return _bucket
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(headers):
+    """Parse a Retry-After header (seconds or HTTP date). Returns None if absent."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing spans and run metrics for the fetchers.
+
+Code under measurement wraps each stage in a span and bumps counters:
+    with span("page_goto", event_id=event_id):
+        page.goto(...)
+    count("api_retries")
+    count("api_bytes", len(response.content))
+
+Spans and counters are kept per process. Pool workers ship theirs back with
+each meeting result (take() in the worker, merge() in the parent), so the
+parent ends up with the whole run. At the end of the run:
+- write_trace() writes every span as one JSON line (name, start, ms, pid and
+  its attributes, e.g. event_id)
+- write_prometheus() writes a node_exporter textfile: p50/p95/p99 and
+  sum/count per stage, per-meeting totals (the "meeting" span), and every
+  counter (retries, bytes transferred) as a *_total
+- summary() returns the per-stage percentiles as printable lines
+"""
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# Quantiles exported per stage
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Metric name prefix in the Prometheus textfile
+METRIC_PREFIX = "legistar"
+
+# Span holding a whole meeting (per-meeting totals)
+MEETING_SPAN = "meeting"
+
+_lock = threading.Lock()
+_spans = []
+_counters = Counter()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block as one span of stage `name` (recorded even if it raises)."""
+    start = time.time()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record = {"name": name, "start": round(start, 3),
+                  "ms": round((time.monotonic() - started) * 1000, 1), "pid": os.getpid()}
+        record.update(attrs)
+        with _lock:
+            _spans.append(record)
+
+
+def count(name, value=1):
+    """Add value to counter `name` (e.g. retries, bytes)."""
+    with _lock:
+        _counters[name] += value
+
+
+def take():
+    """Return this process's {spans, counters} collected so far and start over."""
+    global _spans, _counters
+    with _lock:
+        taken = {"spans": _spans, "counters": dict(_counters)}
+        _spans, _counters = [], Counter()
+    return taken
+
+
+def reset():
+    """Drop everything collected (e.g. what a forked worker inherited)."""
+    take()
+
+
+def merge(metrics):
+    """Add spans and counters taken in another process."""
+    if not metrics:
+        return
+    with _lock:
+        _spans.extend(metrics.get("spans") or ())
+        _counters.update(metrics.get("counters") or {})
+
+
+def _quantile(values, q):
+    """Nearest-rank quantile of sorted values."""
+    index = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[index]
+
+
+def stage_durations():
+    """Return {stage: sorted span durations in seconds}."""
+    durations = {}
+    with _lock:
+        for record in _spans:
+            durations.setdefault(record["name"], []).append(record["ms"] / 1000)
+    for values in durations.values():
+        values.sort()
+    return durations
+
+
+def summary():
+    """Printable per-stage lines, slowest total first, plus the counters."""
+    durations = stage_durations()
+    lines = []
+    for name, values in sorted(durations.items(), key=lambda entry: -sum(entry[1])):
+        quantiles = " ".join(f"p{q * 100:g} {_quantile(values, q):.2f}s" for q in QUANTILES)
+        lines.append(f"{name}: {len(values)} x, total {sum(values):.1f}s, {quantiles}")
+    with _lock:
+        counters = dict(_counters)
+    if counters:
+        lines.append(", ".join(f"{name} {value:,}" for name, value in sorted(counters.items())))
+    return lines
+
+
+def write_trace(path):
+    """Write every span as one JSON object per line, in start order."""
+    with _lock:
+        spans = sorted(_spans, key=lambda record: record["start"])
+    with open(path, "w", encoding="utf-8") as f:
+        for record in spans:
+            f.write(json.dumps(record) + "\n")
+    return len(spans)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def write_prometheus(path, elapsed=None):
+    """
+    Write the Prometheus textfile (written to a temp file and renamed, so a
+    collector never reads it half-written).
+    """
+    durations = stage_durations()
+    with _lock:
+        counters = dict(_counters)
+
+    name = f"{METRIC_PREFIX}_stage_seconds"
+    lines = [
+        f"# HELP {name} Duration of each stage of the run.",
+        f"# TYPE {name} summary",
+    ]
+    for stage, values in sorted(durations.items()):
+        for q in QUANTILES:
+            lines.append(f'{name}{{stage="{_label(stage)}",quantile="{q:g}"}} {_quantile(values, q):.6f}')
+        lines.append(f'{name}_sum{{stage="{_label(stage)}"}} {sum(values):.6f}')
+        lines.append(f'{name}_count{{stage="{_label(stage)}"}} {len(values)}')
+
+    meetings = durations.get(MEETING_SPAN)
+    if meetings:
+        name = f"{METRIC_PREFIX}_meeting_seconds"
+        lines += [
+            f"# HELP {name} Total time per meeting.",
+            f"# TYPE {name} summary",
+        ]
+        for q in QUANTILES:
+            lines.append(f'{name}{{quantile="{q:g}"}} {_quantile(meetings, q):.6f}')
+        lines.append(f"{name}_sum {sum(meetings):.6f}")
+        lines.append(f"{name}_count {len(meetings)}")
+
+    for counter, value in sorted(counters.items()):
+        name = f"{METRIC_PREFIX}_{counter}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {value}"]
+
+    if elapsed is not None:
+        name = f"{METRIC_PREFIX}_run_seconds"
+        lines += [f"# TYPE {name} gauge", f"{name} {elapsed:.3f}"]
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Run state for the fetchers.
+
+Sync watermarks for incremental (--since-last-run) extraction, one per body
+and scope. A watermark is the newest EventLastModifiedUtc /
+EventItemLastModifiedUtc value seen by the last successful run. Values are
+Legistar's own UTC timestamps, so they compare correctly as strings and are
+immune to local clock skew. The scope (date window and output files) keeps
+runs over different windows or outputs from advancing each other's
+watermarks past changes they never wrote.
+
+Per-meeting checkpoints (legistar_cache.CheckpointStore) for --resume: every
+finished meeting is stored as soon as it completes, and a resumed run only
+redoes meetings that are missing, failed, or changed since.
+"""
+
+import os
+import json
+
+from legistar_cache import CACHE_DIR, CheckpointStore
+
+WATERMARK_FILE = os.path.join(CACHE_DIR, "watermarks.json")
+
+_checkpoint_store = None
+
+
+def watermark_key(body_id, scope=""):
+    """Key of a watermark: the body id, plus "|scope" when scoped."""
+    return f"{body_id}|{scope}" if scope else str(body_id)
+
+
+def _load_all(path=WATERMARK_FILE):
+    """Load every stored watermark as {key: timestamp}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_watermark(body_id, scope="", path=WATERMARK_FILE):
+    """Return the stored watermark for a body and scope, or "" if it has never synced."""
+    return _load_all(path).get(watermark_key(body_id, scope), "")
+
+
+def save_watermark(body_id, value, scope="", path=WATERMARK_FILE):
+    """Store a body's watermark for a scope (written atomically)."""
+    watermarks = _load_all(path)
+    watermarks[watermark_key(body_id, scope)] = value
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def newest_modified(records, field, current=""):
+    """Return the newest `field` value across records (or `current` if newer)."""
+    newest = current or ""
+    for record in records:
+        value = record.get(field) or ""
+        if value > newest:
+            newest = value
+    return newest
+
+
+def get_checkpoint_store():
+    """Return this process's checkpoint store (opened lazily)."""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore()
+    return _checkpoint_store